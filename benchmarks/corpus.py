@@ -0,0 +1,183 @@
+"""IMPORTS"""
+import random
+from typing import Any, Dict, List
+
+SUBJECTS: List[str] = list(
+    [
+        "Người lao động",
+        "Người sử dụng lao động",
+        "Doanh nghiệp",
+        "Cơ quan bảo hiểm xã hội",
+        "Ủy ban nhân dân cấp tỉnh",
+        "Công ty trách nhiệm hữu hạn",
+        "Chủ đầu tư",
+        "Tổ chức tín dụng",
+    ]
+)
+VERBS: List[str] = list(
+    [
+        "có trách nhiệm",
+        "được quyền",
+        "phải",
+        "không được",
+        "có nghĩa vụ",
+    ]
+)
+ACTIONS: List[str] = list(
+    [
+        "thanh toán tiền lương",
+        "đóng bảo hiểm xã hội",
+        "thông báo bằng văn bản",
+        "nộp hồ sơ đăng ký",
+        "bồi thường thiệt hại",
+        "chấm dứt hợp đồng lao động",
+        "cung cấp thông tin",
+        "nghỉ hằng năm",
+    ]
+)
+CONDITIONS: List[str] = list(
+    [
+        "trong thời hạn {n} ngày làm việc",
+        "chậm nhất là {n} ngày trước khi thực hiện",
+        "theo quy định tại Điều {n}",
+        "kể từ ngày {n} tháng {m} năm {y}",
+        "với mức không thấp hơn {n} phần trăm",
+    ]
+)
+LAWS: List[str] = list(
+    [
+        "Bộ luật Lao động",
+        "Luật Doanh nghiệp",
+        "Luật Bảo hiểm xã hội",
+        "Luật Đất đai",
+        "Nghị định {n}/{y}/NĐ-CP",
+        "Thông tư {n}/{y}/TT-BTC",
+    ]
+)
+PLACES: List[str] = list(["Hà Nội", "Thành phố Hồ Chí Minh", "Đà Nẵng", "Cần Thơ"])
+
+
+def _fill(template: str, rng: random.Random) -> str:
+    return template.format(
+        n=rng.randint(1, 180), m=rng.randint(1, 12), y=rng.randint(2010, 2024)
+    )
+
+
+def legal_sentence(rng: random.Random) -> str:
+    """
+    A random sentence in the style of a Vietnamese legal text.
+    """
+    sentence = " ".join(
+        [
+            rng.choice(SUBJECTS),
+            "tại",
+            rng.choice(PLACES),
+            rng.choice(VERBS),
+            rng.choice(ACTIONS),
+            _fill(template=rng.choice(CONDITIONS), rng=rng),
+        ]
+    )
+    if rng.random() < 0.5:
+        sentence += ", căn cứ " + _fill(template=rng.choice(LAWS), rng=rng)
+    return sentence + "."
+
+
+def generate_corpus(
+    num_articles: int = 100,
+    num_summaries: int = 2,
+    num_contexts: int = 5,
+    sentences_per_summary: int = 3,
+    sentences_per_context: int = 4,
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Generate synthetic legal articles with the fields of the TVPL dataset (`url`, `title`,
+    `summary`, `document`). Summary sentences are drawn from the contexts of their article, as in
+    real summaries, so that answers can be found in the contexts.
+
+    Args:
+        num_articles (`int`, default to `100`):
+            The number of articles.
+        num_summaries (`int`, default to `2`):
+            The number of summaries of each article.
+        num_contexts (`int`, default to `5`):
+            The number of contexts of each article.
+        sentences_per_summary (`int`, default to `3`):
+            The number of sentences of each summary.
+        sentences_per_context (`int`, default to `4`):
+            The number of sentences of each context.
+        seed (`int`, default to `0`):
+            The seed of the generator, the same seed always giving the same corpus.
+
+    Returns:
+        `List[Dict[str, Any]]`
+    """
+    rng = random.Random(seed)
+    articles: List[Dict[str, Any]] = []
+
+    for article_id in range(num_articles):
+        contexts: List[List[str]] = [
+            [legal_sentence(rng=rng) for _ in range(sentences_per_context)]
+            for _ in range(num_contexts)
+        ]
+        pool = [sentence for context in contexts for sentence in context]
+
+        articles.append(
+            dict(
+                {
+                    "url": f"https://thuvienphapluat.vn/synthetic-{article_id}",
+                    "title": f"Quy định về {rng.choice(ACTIONS)} số {article_id}",
+                    "summary": [
+                        " ".join(
+                            rng.choice(pool)
+                            if rng.random() < 0.8
+                            else legal_sentence(rng=rng)
+                            for _ in range(sentences_per_summary)
+                        )
+                        for _ in range(num_summaries)
+                    ],
+                    "document": [
+                        f"Điều {ctx_id + 1}. " + " ".join(context)
+                        for ctx_id, context in enumerate(contexts)
+                    ],
+                }
+            )
+        )
+
+    return articles
+
+
+def generate_pairs(
+    articles: List[Dict[str, Any]], pairs_per_article: int = 10, seed: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    Generate synthetic QA pairs over `articles`, with the fields of the QA dataset. The question of
+    each pair is a sentence of the context it points to, with the answer replaced by a
+    placeholder.
+    """
+    rng = random.Random(seed)
+    pairs: List[Dict[str, Any]] = []
+
+    for article in articles:
+        for _ in range(pairs_per_article):
+            ctx_id = rng.randrange(len(article["document"]))
+            context = article["document"][ctx_id]
+            sentence = rng.choice(context.split(". "))
+            words = sentence.split(" ")
+            start = rng.randrange(max(len(words) - 3, 1))
+            answer = " ".join(words[start : start + rng.randint(1, 3)])
+            pairs.append(
+                dict(
+                    {
+                        "id": f"qa_{len(pairs)}",
+                        "article": f"{article['url']}__{ctx_id}",
+                        "question": sentence.replace(answer, "NOUNPHRASE", 1),
+                        "answer": answer,
+                        "start": context.find(answer),
+                        "type": "NOUNPHRASE",
+                        "is_impossible": False,
+                    }
+                )
+            )
+
+    return pairs
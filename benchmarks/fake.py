@@ -0,0 +1,110 @@
+"""IMPORTS"""
+from typing import Any, Dict, List
+
+from vietlegalqa.modules.construct.parse import ParseTree
+
+PHRASE_LABELS: List[str] = list(["NP", "VP", "AP"])
+
+
+class FakeObject:
+    """
+    A plain object holding the attributes the construction code reads from stanza outputs.
+    """
+
+    def __init__(self, **kwargs) -> None:
+        self.__dict__.update(kwargs)
+
+
+def fake_tree(tokens: List[str]) -> ParseTree:
+    """
+    A deterministic constituency tree over `tokens`: consecutive pairs of words form `NP`, `VP`
+    and `AP` phrases in turn, numbers are tagged `NUM`, and the second half of a long sentence is
+    nested in its own `S` clause.
+    """
+    phrases: List[ParseTree] = []
+    for idx in range(0, len(tokens), 2):
+        phrases.append(
+            ParseTree(
+                label=PHRASE_LABELS[(idx // 2) % len(PHRASE_LABELS)],
+                children=[
+                    ParseTree(
+                        label="NUM" if token.isdigit() else "N",
+                        children=[ParseTree(label=token)],
+                    )
+                    for token in tokens[idx : idx + 2]
+                ],
+            )
+        )
+
+    if len(phrases) > 3:
+        phrases = phrases[: len(phrases) // 2] + [
+            ParseTree(label="S", children=phrases[len(phrases) // 2 :])
+        ]
+
+    return ParseTree(label="ROOT", children=[ParseTree(label="S", children=phrases)])
+
+
+class FakePipeline:
+    """
+    A stand-in for a pretokenized stanza `Pipeline`, returning canned constituency trees, named
+    entities (capitalized words of several syllables) and, with the `lemma` processor, lower-cased
+    lemmas, without any model.
+    """
+
+    def __init__(
+        self, lang: str = "vi", processors: str = "tokenize, pos, ner, constituency"
+    ) -> None:
+        self.lang = lang
+        self.processors: Dict[str, Any] = {
+            processor.strip(): None for processor in processors.split(",")
+        }
+        self.calls = 0
+
+    def __call__(self, sentences: List[List[str]]) -> FakeObject:
+        self.calls += 1
+        offset = 0
+        doc_sentences: List[FakeObject] = []
+        doc_ents: List[FakeObject] = []
+
+        for sent in sentences:
+            tokens: List[FakeObject] = []
+            for idx, text in enumerate(sent):
+                tokens.append(
+                    FakeObject(
+                        id=(idx + 1,),
+                        text=text,
+                        start_char=offset,
+                        end_char=offset + len(text),
+                    )
+                )
+                offset += len(text) + 1
+
+            ents = [
+                FakeObject(
+                    text=token.text,
+                    type="LOC",
+                    start_char=token.start_char,
+                    end_char=token.end_char,
+                    tokens=[token],
+                )
+                for token in tokens
+                if token.text[:1].isupper() and " " in token.text
+            ]
+            doc_ents.extend(ents)
+            doc_sentences.append(
+                FakeObject(
+                    text=" ".join(sent),
+                    tokens=tokens,
+                    words=[
+                        FakeObject(
+                            text=text,
+                            lemma=text.lower() if "lemma" in self.processors else None,
+                        )
+                        for text in sent
+                    ],
+                    constituency=fake_tree(tokens=sent),
+                    ents=ents,
+                )
+            )
+
+        return FakeObject(sentences=doc_sentences, ents=doc_ents)
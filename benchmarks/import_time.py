@@ -0,0 +1,98 @@
+"""IMPORTS"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES: List[str] = list(["datasets", "stanza", "torch", "underthesea", "numpy"])
+STATEMENTS: List[str] = list(
+    [
+        "import vietlegalqa",
+        "from vietlegalqa import QADataset, load_qa",
+        "from vietlegalqa import Document, QADataset; QADataset().to_list()",
+        "from vietlegalqa.modules.construct.backend import ReplayBackend",
+        "from vietlegalqa import QAConstruct",
+    ]
+)
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+exec({statement!r})
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(",".join(name for name in {modules!r} if name in sys.modules))
+"""
+
+
+def measure(statement: str, repeat: int = 3) -> Dict[str, Any]:
+    """
+    Time `statement` in fresh interpreters, and list the heavy modules it loaded.
+    """
+    times: List[float] = []
+    loaded: List[str] = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                PROBE.format(statement=statement, modules=HEAVY_MODULES),
+            ],
+            cwd=ROOT,
+            env=dict(os.environ, PYTHONPATH=ROOT),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.splitlines()
+        times.append(float(output[0]))
+        loaded = list(name for name in output[1].split(",") if name)
+
+    return dict(
+        {
+            "name": statement,
+            "repeat": repeat,
+            "best": min(times),
+            "mean": sum(times) / len(times),
+            "loaded": loaded,
+        }
+    )
+
+
+def main(args):
+    results = list(measure(statement=statement, repeat=args.repeat) for statement in STATEMENTS)
+
+    for result in results:
+        print(
+            f"{result['name']:<72} best {result['best'] * 1000:>9.1f} ms"
+            f"  loads {', '.join(result['loaded']) or '-'}"
+        )
+
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(
+                dict(
+                    {
+                        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                        "python": platform.python_version(),
+                        "platform": platform.platform(),
+                        "config": vars(args),
+                        "results": results,
+                    }
+                ),
+                file,
+                ensure_ascii=False,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", default=3, type=int)
+    parser.add_argument("--output", default=None, type=str)
+
+    main(parser.parse_args())
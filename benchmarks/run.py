@@ -0,0 +1,671 @@
+"""IMPORTS"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import pickle
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import generate_corpus, generate_pairs
+from fake import FakePipeline
+from vietlegalqa import (
+    AnswerAtStartRule,
+    Article,
+    Document,
+    Filter,
+    LengthRule,
+    PlaceholderRule,
+    QAConstruct,
+    QADataset,
+    QAPair,
+    ShardWriter,
+    StopwordRatioRule,
+    TypeQuotaRule,
+    load_document,
+    load_qa,
+)
+from vietlegalqa.data.index import ContextIndex
+from vietlegalqa.data.jsonl import jsonl_path
+from vietlegalqa.modules.construct.locate import AnswerLocator
+from vietlegalqa.modules.construct.utils import select_context, select_contexts
+
+FIELD = ["url", "title", "summary", "document"]
+GROUPS = ["construct", "rank", "load", "serialize", "index", "filter", "records"]
+COMPRESSIONS = [None, "gzip"] + (["zstd"] if importlib.util.find_spec("zstandard") else [])
+
+
+def measure(
+    name: str, func: Callable[[], Any], items: int, repeat: int = 3
+) -> Dict[str, Any]:
+    """
+    Run `func` `repeat` times and report its timings, `items` being the number of items it
+    processes per run.
+    """
+    times: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    return dict(
+        {
+            "name": name,
+            "repeat": repeat,
+            "items": items,
+            "best": min(times),
+            "mean": sum(times) / len(times),
+            "items_per_sec": items / min(times) if min(times) > 0 else None,
+        }
+    )
+
+
+def measure_memory(
+    name: str, func: Callable[[], Any], items: int, peak: bool = False
+) -> Dict[str, Any]:
+    """
+    Report the memory still allocated by the object `func` builds, or the peak memory allocated
+    while building it, per item.
+    """
+    tracemalloc.start()
+    value = func()
+    size = tracemalloc.get_traced_memory()[1 if peak else 0]
+    tracemalloc.stop()
+    del value
+
+    return dict({"name": name, "items": items, "bytes": size, "bytes_per_item": size / items})
+
+
+def bench_construct(
+    data: List[Dict[str, Any]], stopwords: List[str], repeat: int
+) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+    document = Document(data=data, field=FIELD)
+
+    for name, shared, kwargs in [
+        ("construct.default", False, dict()),
+        ("construct.batched", False, dict(batch_size=64)),
+        ("construct.prefetch", False, dict(batch_size=64, prefetch=2)),
+        ("construct.find", False, dict(batch_size=64, locate_method="find")),
+        ("construct.index", False, dict(batch_size=64, rank_method="index")),
+        ("construct.shared", True, dict(batch_size=64)),
+    ]:
+
+        def run() -> None:
+            constructor = QAConstruct(
+                stopwords=stopwords,
+                parser=(
+                    FakePipeline(processors="tokenize, pos, lemma, ner, constituency")
+                    if shared
+                    else FakePipeline()
+                ),
+                pos=None if shared else FakePipeline(processors="tokenize, pos, lemma"),
+                progress=False,
+                **kwargs,
+            )
+            for _ in constructor.iter_pairs(document=document):
+                pass
+
+        results.append(measure(name=name, func=run, items=len(data), repeat=repeat))
+
+    return results
+
+
+def bench_rank(
+    data: List[Dict[str, Any]], pairs: List[Dict[str, Any]], repeat: int
+) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+    document = Document(data=data, field=FIELD)
+    queries = [
+        (document[pair["article"].rsplit("__", 1)[0]], pair["question"].lower().split())
+        for pair in pairs
+    ]
+
+    batches: Dict[str, Tuple[Article, List[List[str]]]] = {}
+    for article, tokens in queries:
+        batches.setdefault(article.id, (article, []))[1].append(tokens)
+
+    for method in ["index", "substring"]:
+
+        def run() -> None:
+            for article, tokens in queries:
+                select_context(q_tokens=tokens, article=article, method=method)
+
+        def run_batch() -> None:
+            for article, article_queries in batches.values():
+                select_contexts(queries=article_queries, article=article, method=method)
+
+        results.append(
+            measure(name=f"rank.{method}", func=run, items=len(queries), repeat=repeat)
+        )
+        results.append(
+            measure(
+                name=f"rank.{method}.batch", func=run_batch, items=len(queries), repeat=repeat
+            )
+        )
+
+    answers: Dict[str, List[str]] = {}
+    for pair in pairs:
+        answers.setdefault(pair["article"].rsplit("__", 1)[0], []).append(pair["answer"])
+
+    def run_automaton() -> None:
+        for article_id, article_answers in answers.items():
+            AnswerLocator(answers=article_answers).locate(
+                contexts=document[article_id].context
+            )
+
+    def run_find() -> None:
+        for article_id, article_answers in answers.items():
+            for answer in article_answers:
+                for context in document[article_id].context:
+                    context.find(answer)
+
+    results.append(
+        measure(
+            name="locate.automaton", func=run_automaton, items=len(pairs), repeat=repeat
+        )
+    )
+    results.append(
+        measure(name="locate.find", func=run_find, items=len(pairs), repeat=repeat)
+    )
+
+    return results
+
+
+def bench_serialize(
+    data: List[Dict[str, Any]], pairs: List[Dict[str, Any]], directory: str, repeat: int
+) -> List[Dict[str, Any]]:
+    document = Document(data=data, field=FIELD)
+    dataset = QADataset(data=pairs, field=list(pairs[0].keys()))
+
+    def write_shards() -> None:
+        with ShardWriter(
+            directory=os.path.join(directory, "shards"), prefix="qa", shard_size=10000
+        ) as writer:
+            for pair in dataset:
+                writer.write(pair)
+
+    return list(
+        [
+            measure(
+                name="serialize.document.json",
+                func=lambda: document.to_json(path=os.path.join(directory, "doc")),
+                items=len(document),
+                repeat=repeat,
+            ),
+            measure(
+                name="serialize.document.pickle",
+                func=lambda: document.to_pickle(path=os.path.join(directory, "doc")),
+                items=len(document),
+                repeat=repeat,
+            ),
+            measure(
+                name="serialize.qa.json",
+                func=lambda: dataset.to_json(path=os.path.join(directory, "qa")),
+                items=len(dataset),
+                repeat=repeat,
+            ),
+            measure(
+                name="serialize.qa.pickle",
+                func=lambda: dataset.to_pickle(path=os.path.join(directory, "qa")),
+                items=len(dataset),
+                repeat=repeat,
+            ),
+            measure(
+                name="serialize.qa.jsonl",
+                func=write_shards,
+                items=len(dataset),
+                repeat=repeat,
+            ),
+            *(
+                measure(
+                    name=f"serialize.qa.jsonl.{compression or 'file'}",
+                    func=lambda compression=compression: dataset.to_jsonl(
+                        path=os.path.join(directory, "qa"), compression=compression
+                    ),
+                    items=len(dataset),
+                    repeat=repeat,
+                )
+                for compression in COMPRESSIONS
+            ),
+        ]
+    )
+
+
+def bench_load(
+    num_articles: int, num_pairs: int, directory: str, repeat: int
+) -> List[Dict[str, Any]]:
+    return list(
+        [
+            measure(
+                name="load.document.json",
+                func=lambda: load_document(
+                    path=os.path.join(directory, "doc"), filetype="json"
+                ),
+                items=num_articles,
+                repeat=repeat,
+            ),
+            measure(
+                name="load.document.pickle",
+                func=lambda: load_document(
+                    path=os.path.join(directory, "doc"), filetype="pickle"
+                ),
+                items=num_articles,
+                repeat=repeat,
+            ),
+            measure(
+                name="load.qa.json",
+                func=lambda: load_qa(path=os.path.join(directory, "qa"), filetype="json"),
+                items=num_pairs,
+                repeat=repeat,
+            ),
+            measure(
+                name="load.qa.json.arrow",
+                func=lambda: load_qa(
+                    path=os.path.join(directory, "qa"), filetype="json", backend="arrow"
+                ),
+                items=num_pairs,
+                repeat=repeat,
+            ),
+            measure(
+                name="load.qa.pickle",
+                func=lambda: load_qa(
+                    path=os.path.join(directory, "qa"), filetype="pickle"
+                ),
+                items=num_pairs,
+                repeat=repeat,
+            ),
+            measure(
+                name="load.qa.jsonl",
+                func=lambda: load_qa(
+                    path=os.path.join(directory, "shards"), filetype="jsonl"
+                ),
+                items=num_pairs,
+                repeat=repeat,
+            ),
+            *(
+                measure(
+                    name=f"load.qa.jsonl.{compression or 'file'}",
+                    func=lambda compression=compression: load_qa(
+                        path=jsonl_path(
+                            path=os.path.join(directory, "qa"), compression=compression
+                        ),
+                        filetype="jsonl",
+                    ),
+                    items=num_pairs,
+                    repeat=repeat,
+                )
+                for compression in COMPRESSIONS
+            ),
+            measure_memory(
+                name="load.qa.json.peak",
+                func=lambda: load_qa(path=os.path.join(directory, "qa"), filetype="json"),
+                items=num_pairs,
+                peak=True,
+            ),
+            measure_memory(
+                name="load.qa.jsonl.peak",
+                func=lambda: load_qa(path=os.path.join(directory, "shards"), filetype="jsonl"),
+                items=num_pairs,
+                peak=True,
+            ),
+        ]
+    )
+
+
+def bench_index(
+    data: List[Dict[str, Any]], pairs: List[Dict[str, Any]], repeat: int
+) -> List[Dict[str, Any]]:
+    document = Document(data=data, field=FIELD)
+    dataset = QADataset(data=pairs, field=list(pairs[0].keys()))
+    ids = [pair["id"] for pair in pairs]
+    positions = list(range(0, len(dataset), max(len(dataset) // 1000, 1)))
+
+    articles = [article.id for article in document][:: max(len(document) // 100, 1)]
+
+    def run_build() -> None:
+        for article in document:
+            ContextIndex(contexts=article.context)
+
+    def run_article_scan() -> None:
+        for article_id in articles:
+            [pair for pair in dataset if pair.article.rsplit("__", 1)[0] == article_id]
+
+    def run_iter() -> None:
+        for pair in dataset:
+            pair.answer
+
+    return list(
+        [
+            measure(
+                name="index.qa.key",
+                func=lambda: [dataset[index] for index in ids],
+                items=len(ids),
+                repeat=repeat,
+            ),
+            measure(
+                name="index.qa.position",
+                func=lambda: [dataset[position] for position in positions],
+                items=len(positions),
+                repeat=repeat,
+            ),
+            measure(
+                name="index.qa.slice",
+                func=lambda: dataset[len(dataset) // 2 : len(dataset) // 2 + 100],
+                items=1,
+                repeat=repeat,
+            ),
+            measure(
+                name="index.qa.select",
+                func=lambda: list(dataset[positions]),
+                items=len(positions),
+                repeat=repeat,
+            ),
+            measure(
+                name="index.qa.contains",
+                func=lambda: [dataset[index] in dataset for index in ids[:1000]],
+                items=min(len(ids), 1000),
+                repeat=repeat,
+            ),
+            measure(
+                name="index.qa.iter", func=run_iter, items=len(dataset), repeat=repeat
+            ),
+            measure(
+                name="index.qa.article",
+                func=lambda: [dataset.get_pairs(article=article_id) for article_id in articles],
+                items=len(articles),
+                repeat=repeat,
+            ),
+            measure(
+                name="index.qa.article.scan",
+                func=run_article_scan,
+                items=len(articles),
+                repeat=repeat,
+            ),
+            measure(
+                name="index.qa.join",
+                func=lambda: dataset.get_contexts(document=document),
+                items=len(dataset),
+                repeat=repeat,
+            ),
+            measure(
+                name="index.context.build",
+                func=run_build,
+                items=len(document),
+                repeat=repeat,
+            ),
+        ]
+    )
+
+
+def bench_filter(
+    data: List[Dict[str, Any]],
+    pairs: List[Dict[str, Any]],
+    stopwords: List[str],
+    repeat: int,
+) -> List[Dict[str, Any]]:
+    document = Document(data=data, field=FIELD)
+    dataset = QADataset(data=pairs, field=list(pairs[0].keys()))
+    rules = list(
+        [
+            LengthRule(field="answer", min_length=2, max_length=64),
+            LengthRule(field="question", min_length=3, unit="word"),
+            AnswerAtStartRule(document=document),
+            PlaceholderRule(),
+            StopwordRatioRule(stopwords=stopwords),
+            TypeQuotaRule(quotas={}, default=len(pairs) // 2),
+        ]
+    )
+
+    def run_loop() -> None:
+        counts: Dict[str, int] = {}
+        stopword_set = set(stopwords)
+        kept = QADataset()
+        for pair in dataset:
+            article_id, _, ctx_id = pair.article.rpartition("__")
+            context = document[article_id].context[int(ctx_id)]
+            words = pair.question.lower().split()
+            if not 2 <= len(pair.answer) <= 64 or len(pair.question.split()) < 3:
+                continue
+            if pair.start < 0 or context[pair.start : pair.start + len(pair.answer)] != pair.answer:
+                continue
+            if pair.type not in pair.question:
+                continue
+            if sum(word in stopword_set for word in words) > 0.5 * len(words):
+                continue
+            counts[pair.type] = counts.get(pair.type, 0) + 1
+            if counts[pair.type] > len(pairs) // 2:
+                continue
+            kept.append(pair)
+
+    return list(
+        [
+            measure(
+                name="filter.loop", func=run_loop, items=len(dataset), repeat=repeat
+            ),
+            measure(
+                name="filter.masks",
+                func=lambda: Filter(rules=rules)(dataset),
+                items=len(dataset),
+                repeat=repeat,
+            ),
+        ]
+    )
+
+
+def bench_records(pairs: List[Dict[str, Any]], repeat: int) -> List[Dict[str, Any]]:
+    rows = [list(pair.values()) for pair in pairs]
+    entries = [
+        QAPair(
+            index=row[0],
+            article=row[1],
+            question=row[2],
+            answer=row[3],
+            start=row[4],
+            ans_type=row[5],
+            is_impossible=row[6],
+        )
+        for row in rows
+    ]
+    dumped = pickle.dumps(entries, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def run_create() -> None:
+        for row in rows:
+            QAPair(
+                index=row[0],
+                article=row[1],
+                question=row[2],
+                answer=row[3],
+                start=row[4],
+                ans_type=row[5],
+                is_impossible=row[6],
+            )
+
+    def run_attribute() -> None:
+        for entry in entries:
+            entry.answer
+
+    def run_key() -> None:
+        for entry in entries:
+            entry["answer"]
+
+    def run_call() -> None:
+        for entry in entries:
+            entry("answer")
+
+    def run_to_dict() -> None:
+        for entry in entries:
+            entry.to_dict()
+
+    def run_to_list() -> None:
+        for entry in entries:
+            entry.to_list()
+
+    return list(
+        [
+            measure_memory(
+                name="records.qa.memory",
+                func=lambda: [
+                    QAPair(
+                        index=row[0],
+                        article=row[1],
+                        question=row[2],
+                        answer=row[3],
+                        start=row[4],
+                        ans_type=row[5],
+                        is_impossible=row[6],
+                    )
+                    for row in rows
+                ],
+                items=len(rows),
+            ),
+            *(
+                measure(name=name, func=func, items=len(entries), repeat=repeat)
+                for name, func in [
+                    ("records.qa.create", run_create),
+                    ("records.qa.attribute", run_attribute),
+                    ("records.qa.key", run_key),
+                    ("records.qa.call", run_call),
+                    ("records.qa.to_dict", run_to_dict),
+                    ("records.qa.to_list", run_to_list),
+                    ("records.qa.pickle.dump", lambda: pickle.dumps(entries)),
+                    ("records.qa.pickle.load", lambda: pickle.loads(dumped)),
+                ]
+            ),
+        ]
+    )
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def main(args):
+    data = generate_corpus(
+        num_articles=args.articles,
+        num_summaries=args.summaries,
+        num_contexts=args.contexts,
+        seed=args.seed,
+    )
+    pairs = generate_pairs(
+        articles=data, pairs_per_article=args.pairs_per_article, seed=args.seed
+    )
+    with open(args.stopwords_dir, "r", encoding="utf-8") as stopwords_file:
+        stopwords = stopwords_file.read().splitlines()
+
+    groups = GROUPS if args.only is None else args.only.split(",")
+    results: List[Dict[str, Any]] = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        if "construct" in groups:
+            results.extend(
+                bench_construct(
+                    data=data[: args.construct_articles],
+                    stopwords=stopwords,
+                    repeat=args.repeat,
+                )
+            )
+        if "rank" in groups:
+            results.extend(bench_rank(data=data, pairs=pairs, repeat=args.repeat))
+        if "serialize" in groups or "load" in groups:
+            results.extend(
+                bench_serialize(
+                    data=data, pairs=pairs, directory=directory, repeat=args.repeat
+                )
+            )
+        if "load" in groups:
+            results.extend(
+                bench_load(
+                    num_articles=len(data),
+                    num_pairs=len(pairs),
+                    directory=directory,
+                    repeat=args.repeat,
+                )
+            )
+        if "index" in groups:
+            results.extend(bench_index(data=data, pairs=pairs, repeat=args.repeat))
+        if "records" in groups:
+            results.extend(bench_records(pairs=pairs, repeat=args.repeat))
+        if "filter" in groups:
+            results.extend(
+                bench_filter(
+                    data=data, pairs=pairs, stopwords=stopwords, repeat=args.repeat
+                )
+            )
+
+    report = dict(
+        {
+            "revision": git_revision(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": vars(args),
+            "results": results,
+        }
+    )
+
+    baseline: Dict[str, Dict[str, Any]] = {}
+    if args.baseline is not None:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = {result["name"]: result for result in json.load(file)["results"]}
+
+    for result in results:
+        if "bytes_per_item" in result:
+            line = f"{result['name']:<32} {result['bytes_per_item']:>13.1f} bytes/item"
+            if result["name"] in baseline and result["bytes"] > 0:
+                line += f"  x{baseline[result['name']]['bytes'] / result['bytes']:.2f}"
+            print(line)
+            continue
+
+        line = (
+            f"{result['name']:<32} best {result['best'] * 1000:>10.2f} ms"
+            f"  {result['items_per_sec'] or 0:>14.1f} items/s"
+        )
+        if result["name"] in baseline and result["best"] > 0:
+            line += f"  x{baseline[result['name']]['best'] / result['best']:.2f}"
+        print(line)
+
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", default=1000, type=int)
+    parser.add_argument("--summaries", default=2, type=int)
+    parser.add_argument("--contexts", default=5, type=int)
+    parser.add_argument("--pairs_per_article", default=10, type=int)
+    parser.add_argument("--construct_articles", default=200, type=int)
+    parser.add_argument("--repeat", default=3, type=int)
+    parser.add_argument("--seed", default=0, type=int)
+    parser.add_argument(
+        "--stopwords_dir",
+        default=os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            "data",
+            "vietnamese-stopwords.txt",
+        ),
+        type=str,
+    )
+    parser.add_argument("--only", default=None, type=str)
+    parser.add_argument("--output", default=None, type=str)
+    parser.add_argument("--baseline", default=None, type=str)
+
+    main(parser.parse_args())
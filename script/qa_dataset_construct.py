@@ -1,5 +1,19 @@
 import argparse
-from vietlegalqa import load_document_hf, QAConstruct
+import os
+from vietlegalqa import (
+    load_document_hf,
+    iter_parallel_articles,
+    Checkpoint,
+    ConstructStats,
+    ParseCache,
+    Preprocessor,
+    QAConstruct,
+    QADataset,
+    RecordingBackend,
+    ReplayBackend,
+    ShardWriter,
+    StanzaBackend,
+)
 from stanza import Pipeline
 from torch.cuda import is_available, device_count
 
@@ -23,6 +37,21 @@ def check_args(args) -> tuple[bool, str]:
 
 def main(args):
     doc = load_document_hf(path=args.doc, split="train", field=FIELD)
+    if args.preprocess:
+        doc = Preprocessor(
+            max_context_length=args.max_context_length,
+            max_sentence_length=args.max_sentence_length,
+            num_workers=args.num_workers,
+        )(doc)
+        # The pairs point to the contexts of the preprocessed articles, so they are saved with them.
+        doc.to_pickle(
+            path=args.preprocessed_path
+            or (
+                os.path.join(args.output_dir, "document.pkl")
+                if args.output_dir is not None
+                else f"./data/{args.id_prefix}_preprocessed.pkl"
+            )
+        )
 
     with open(
         args.stopwords_dir,
@@ -31,9 +60,13 @@ def main(args):
     ) as stopwords_file:
         STOPWORDS = stopwords_file.read().splitlines()
 
-    PARSER = Pipeline(
+    PARSER_CONFIG = dict(
         lang=args.lang,
-        processors="tokenize, pos, ner, constituency",
+        processors=(
+            "tokenize, pos, lemma, ner, constituency"
+            if args.shared_pipeline
+            else "tokenize, pos, ner, constituency"
+        ),
         use_gpu=args.use_gpu,
         device=args.device,
         verbose=args.verbose,
@@ -41,7 +74,7 @@ def main(args):
         tokenize_pretokenized=True,
         tokenize_no_ssplit=True,
     )
-    POS = Pipeline(
+    POS_CONFIG = dict(
         lang=args.lang,
         processors="tokenize, pos, lemma",
         use_gpu=args.use_gpu,
@@ -51,10 +84,97 @@ def main(args):
         tokenize_pretokenized=True,
         tokenize_no_ssplit=True,
     )
+    if args.shared_pipeline:
+        POS_CONFIG = None
 
-    constructor = QAConstruct(stopwords=STOPWORDS, parser=PARSER, pos=POS)
-    qa = constructor(document=doc, id_prefix=args.id_prefix)
-    qa.to_pickle("./data/tvpl_contruct.pkl")
+    checkpoint = None
+    if args.output_dir is not None:
+        checkpoint = Checkpoint(path=os.path.join(args.output_dir, "checkpoint.json"))
+        if args.resume:
+            checkpoint = Checkpoint.load(path=checkpoint.path)
+            doc = checkpoint.remaining(document=doc)
+
+    backend = None
+    if args.replay_dir is not None:
+        backend = ReplayBackend(path=args.replay_dir)
+
+    stats = ConstructStats(enabled=args.stats_path is not None)
+    if args.num_workers > 1:
+        articles = iter_parallel_articles(
+            document=doc,
+            stopwords=STOPWORDS,
+            parser_config=PARSER_CONFIG if backend is None else None,
+            pos_config=POS_CONFIG if backend is None else None,
+            num_workers=args.num_workers,
+            shard_size=args.shard_size,
+            id_prefix=args.id_prefix,
+            start=checkpoint.count if checkpoint is not None else 0,
+            batch_size=args.batch_size,
+            batch_unit=args.batch_unit,
+            rank_method=args.rank_method,
+            locate_method=args.locate_method,
+            prefetch=args.prefetch,
+            dedupe=args.dedupe,
+            cache_path=args.cache_path,
+            cache_size=args.cache_size,
+            stats=stats,
+            backend=backend,
+        )
+    else:
+        if backend is None:
+            backend = StanzaBackend(
+                parser=Pipeline(**PARSER_CONFIG),
+                pos=Pipeline(**POS_CONFIG) if POS_CONFIG is not None else None,
+                batch_size=args.batch_size,
+                batch_unit=args.batch_unit,
+                cache=(
+                    ParseCache(path=args.cache_path, max_size=args.cache_size)
+                    if args.cache_path is not None
+                    else None
+                ),
+            )
+            if args.record_dir is not None:
+                backend = RecordingBackend(backend=backend, directory=args.record_dir)
+
+        constructor = QAConstruct(
+            stopwords=STOPWORDS,
+            batch_size=args.batch_size,
+            batch_unit=args.batch_unit,
+            rank_method=args.rank_method,
+            locate_method=args.locate_method,
+            prefetch=args.prefetch,
+            dedupe=args.dedupe,
+            stats=stats.enabled,
+            backend=backend,
+        )
+        stats = constructor.stats
+        articles = constructor.iter_articles(
+            document=doc,
+            id_prefix=args.id_prefix,
+            start=checkpoint.count if checkpoint is not None else 0,
+        )
+
+    if checkpoint is not None:
+        with ShardWriter(
+            directory=args.output_dir,
+            prefix=args.id_prefix,
+            shard_size=args.output_shard_size,
+            state=checkpoint.writer,
+            compression=args.output_compression,
+        ) as writer:
+            checkpoint.consume(
+                stream=articles, writer=writer, every=args.checkpoint_every
+            )
+    else:
+        qa = QADataset()
+        qa.extend(pair for _, pairs in articles for pair in pairs)
+        qa.to_pickle("./data/tvpl_contruct.pkl")
+
+    if isinstance(backend, RecordingBackend):
+        backend.close()
+
+    if args.stats_path is not None:
+        stats.to_json(path=args.stats_path)
 
 
 if __name__ == "__main__":
@@ -63,11 +183,53 @@ if __name__ == "__main__":
     parser.add_argument("--stopwords_dir", default=STOPWORDS_DIR, type=str)
     parser.add_argument("--id_prefix", default=PREFIX, type=str)
     parser.add_argument("--output_file", default=f"{PREFIX}_construct.py", type=str)
+    parser.add_argument("--output_dir", default=None, type=str)
+    parser.add_argument("--output_shard_size", default=100000, type=int)
+    parser.add_argument(
+        "--output_compression", default=None, type=str, choices=["gzip", "zstd"]
+    )
+    parser.add_argument("--prefetch", default=2, type=int)
+    parser.add_argument("--checkpoint_every", default=100, type=int)
+    parser.add_argument("--resume", action="store_true")
+    parser.add_argument("--stats_path", default=None, type=str)
+    parser.add_argument("--replay_dir", default=None, type=str)
+    parser.add_argument("--record_dir", default=None, type=str)
+    parser.add_argument("--preprocess", action="store_true")
+    parser.add_argument("--preprocessed_path", default=None, type=str)
+    parser.add_argument("--max_context_length", default=4000, type=int)
+    parser.add_argument("--max_sentence_length", default=500, type=int)
+    parser.add_argument("--shared_pipeline", action="store_true")
+    parser.add_argument("--dedupe", action="store_true")
     parser.add_argument("--lang", default="vi", type=str)
     parser.add_argument("--use_gpu", default=True, type=bool)
     parser.add_argument("--device", default=0, type=int)
     parser.add_argument("--verbose", default=0, type=bool)
+    parser.add_argument("--batch_size", default=1, type=int)
+    parser.add_argument(
+        "--batch_unit", default="sentence", choices=["sentence", "token"], type=str
+    )
+    parser.add_argument("--num_workers", default=1, type=int)
+    parser.add_argument("--shard_size", default=1000, type=int)
+    parser.add_argument("--cache_path", default=None, type=str)
+    parser.add_argument("--cache_size", default=2**30, type=int)
+    parser.add_argument(
+        "--rank_method", default="substring", choices=["index", "substring"], type=str
+    )
+    parser.add_argument(
+        "--locate_method",
+        default="auto",
+        choices=["auto", "automaton", "find"],
+        type=str,
+    )
     args = parser.parse_args()
+    if args.resume and args.output_dir is None:
+        parser.error("--resume requires --output_dir: only sharded runs are checkpointed")
+    if args.record_dir is not None and args.num_workers > 1:
+        parser.error(
+            "--record_dir requires --num_workers 1: parses are only recorded in the main process"
+        )
+    if args.record_dir is not None and args.replay_dir is not None:
+        parser.error("--record_dir cannot be combined with --replay_dir")
 
     if check_args(args):
         main(args)
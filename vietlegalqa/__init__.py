@@ -1,11 +1,82 @@
+import importlib
+from typing import Any, List
+
 from .data import (
     Article,
     Document,
     QAPair,
     QADataset,
+    iter_document,
+    iter_qa,
     load_document,
     load_document_hf,
     load_qa,
     load_qa_hf,
+    ShardWriter,
+    DatasetView,
 )
-from .modules import QAConstruct
+
+# The Arrow-backed datasets are loaded with pyarrow on first access, see `vietlegalqa.data`.
+_DATA_API: List[str] = list(["ArrowDocument", "ArrowQADataset"])
+
+# The construction API needs stanza, torch and underthesea: it is only imported on first access.
+_MODULES_API: List[str] = list(
+    [
+        "AnswerAtStartRule",
+        "Checkpoint",
+        "ConstructStats",
+        "Filter",
+        "LengthRule",
+        "ParseCache",
+        "ParserBackend",
+        "PlaceholderRule",
+        "Preprocessor",
+        "QAColumns",
+        "QAConstruct",
+        "RecordingBackend",
+        "ReplayBackend",
+        "Rule",
+        "StageStats",
+        "StanzaBackend",
+        "StopwordRatioRule",
+        "TokenCache",
+        "TypeQuotaRule",
+        "iter_parallel_articles",
+        "iter_parallel_pairs",
+        "parallel_construct",
+    ]
+)
+
+__all__ = list(
+    [
+        "Article",
+        "Document",
+        "QAPair",
+        "QADataset",
+        "iter_document",
+        "iter_qa",
+        "load_document",
+        "load_document_hf",
+        "load_qa",
+        "load_qa_hf",
+        "ShardWriter",
+        "DatasetView",
+        *_DATA_API,
+        *_MODULES_API,
+    ]
+)
+
+
+def __getattr__(name: str) -> Any:
+    if name in _DATA_API:
+        value = getattr(importlib.import_module(".data", __name__), name)
+    elif name in _MODULES_API:
+        value = getattr(importlib.import_module(".modules", __name__), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
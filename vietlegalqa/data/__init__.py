@@ -1,4 +1,27 @@
 """IMPORTS"""
+import importlib
+from typing import Any, List
+
 from .doc import Article, Document
 from .qa import QAPair, QADataset
-from .load import load_document, load_document_hf, load_qa, load_qa_hf
+from .load import (
+    iter_document,
+    iter_qa,
+    load_document,
+    load_document_hf,
+    load_qa,
+    load_qa_hf,
+)
+from .shard import ShardWriter
+from .utils import DatasetView
+
+# The Arrow-backed datasets need pyarrow: they are only imported on first access.
+_ARROW_API: List[str] = list(["ArrowDocument", "ArrowQADataset"])
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _ARROW_API:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(".arrow", __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,397 @@
+"""IMPORTS"""
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Sequence,
+    Tuple,
+    Union,
+)
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .doc import Article, Document
+from .jsonl import write_jsonl
+from .qa import INDEXES, QADataset, QAPair
+from .utils import DOC_FIELD, QA_FIELD, DatasetView, Entry
+
+if TYPE_CHECKING:
+    from datasets import Dataset as hf_dataset
+
+QA_SCHEMA = pa.schema(
+    [
+        pa.field(QA_FIELD[0], pa.string()),
+        pa.field(QA_FIELD[1], pa.string()),
+        pa.field(QA_FIELD[2], pa.string()),
+        pa.field(QA_FIELD[3], pa.string()),
+        pa.field(QA_FIELD[4], pa.int64()),
+        pa.field(QA_FIELD[5], pa.string()),
+        pa.field(QA_FIELD[6], pa.bool_()),
+    ]
+)
+DOC_SCHEMA = pa.schema(
+    [
+        pa.field(DOC_FIELD[0], pa.string()),
+        pa.field(DOC_FIELD[1], pa.string()),
+        pa.field(DOC_FIELD[2], pa.list_(pa.string())),
+        pa.field(DOC_FIELD[3], pa.list_(pa.string())),
+    ]
+)
+BATCH_SIZE = 1024
+
+
+def to_table(
+    data: Union[List[Dict[str, Any]], Dict[str, List[Any]], pa.Table, None],
+    field: List[str],
+    schema: pa.Schema,
+) -> pa.Table:
+    """
+    Builds a table with the columns of `schema` from rows, columns or another table whose column
+    names are given by `field`, in the order of the schema.
+    """
+    match data:
+        case None:
+            return schema.empty_table()
+        case list():
+            table = pa.Table.from_pylist(
+                [{name: entry[name] for name in field} for entry in data]
+            )
+        case dict():
+            table = pa.table({name: data[name] for name in field})
+        case pa.Table():
+            table = data
+        case _:
+            raise TypeError(f"data must be rows, columns or a pyarrow Table, got {type(data)}")
+
+    if len(table) == 0:
+        return schema.empty_table()
+    return table.select(field).rename_columns(schema.names).cast(schema)
+
+
+class ArrowStore:
+    """
+    The storage of the Arrow-backed datasets: the fields of the entries are kept as the columns of
+    a `pyarrow.Table`, and an entry object is only built when it is accessed. Appended entries are
+    buffered and added to the table on the next access to it. As with the dictionary of the other
+    datasets, appending an entry with an existing ID replaces the previous one in place.
+    """
+
+    schema: pa.Schema = None
+
+    def _init_store(self, table: pa.Table) -> None:
+        self._table = table
+        self._pending: List[Dict[str, Any]] = []
+        self._positions: Dict[str, int] = None
+        # Rows sharing an ID are merged as if they had been appended one after the other.
+        ids = table.column(self.schema.names[0])
+        self._replaced = pc.count_distinct(ids, mode="all").as_py() != len(ids)
+        if self._replaced:
+            self._compact()
+
+    def _compact(self) -> None:
+        """
+        Keep the first position of each ID with the values of its last row.
+        """
+        last: Dict[str, int] = {}
+        for row, index in enumerate(self._table.column(self.schema.names[0]).to_pylist()):
+            last[index] = row
+        self._table = self._table.take(list(last.values()))
+        self._positions = {index: row for row, index in enumerate(last)}
+        self._replaced = False
+
+    def _entry(self, row: Dict[str, Any]) -> Entry:
+        raise NotImplementedError
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Entry]):
+        """
+        Builds a dataset from entry objects, such as those of a dict-backed dataset.
+        """
+        batches: List[pa.RecordBatch] = []
+        rows: List[Dict[str, Any]] = []
+        for entry in entries:
+            rows.append(entry.to_dict())
+            if len(rows) == BATCH_SIZE:
+                batches.append(pa.RecordBatch.from_pylist(rows, schema=cls.schema))
+                rows = []
+        if len(rows) > 0:
+            batches.append(pa.RecordBatch.from_pylist(rows, schema=cls.schema))
+        return cls(table=pa.Table.from_batches(batches, schema=cls.schema))
+
+    @property
+    def table(self) -> pa.Table:
+        """Access to the table of the entries, including those appended since the last access."""
+        if len(self._pending) > 0:
+            self._table = pa.concat_tables(
+                [self._table, pa.Table.from_pylist(self._pending, schema=self.schema)]
+            )
+            self._pending = []
+            if self._replaced:
+                self._compact()
+        return self._table
+
+    @property
+    def positions(self) -> Dict[str, int]:
+        """Access to the position of each entry ID, built on first use."""
+        if self._positions is None:
+            ids = self.table.column(self.schema.names[0]).to_pylist()
+            self._positions = {index: row for row, index in enumerate(ids)}
+        return self._positions
+
+    @property
+    def data(self) -> Dict[str, Entry]:
+        """
+        Access to the entries as a dictionary keyed by ID, built from the table on each access:
+        changes to it are not stored.
+        """
+        return {entry.id: entry for entry in self}
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    @property
+    def ids(self) -> List[str]:
+        """Access to the IDs of the entries in dataset order."""
+        return list(self.positions)
+
+    def __getitem__(
+        self, key: Union[str, int, slice, Sequence[int]]
+    ) -> Union[Entry, DatasetView, None]:
+        try:
+            match key:
+                case str():
+                    row = self.positions.get(key)
+                    return self._entry(self._row(row)) if row is not None else self._entry({})
+                case _:
+                    return self._select(key)
+        except Exception as e:
+            raise e
+
+    def _row(self, row: int) -> Dict[str, Any]:
+        return self.table.slice(row, 1).to_pylist()[0]
+
+    def _at(self, row: int) -> Entry:
+        return self._entry(self._row(row))
+
+    def __iter__(self) -> Iterator[Entry]:
+        for batch in self.table.to_batches(max_chunksize=BATCH_SIZE):
+            yield from map(self._entry, batch.to_pylist())
+
+    def __getstate__(self) -> Dict[str, Any]:
+        self.table
+        state = self.__dict__.copy()
+        state["_positions"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+
+    def append(self, entry: Entry):
+        try:
+            positions = self.positions
+            if entry.id in positions:
+                self._replaced = True
+            else:
+                positions[entry.id] = len(positions)
+            self._pending.append(entry.to_dict())
+        except Exception as e:
+            raise e
+
+    def extend(self, entries: Iterable[Entry]):
+        try:
+            for entry in entries:
+                self.append(entry)
+        except Exception as e:
+            raise e
+
+    def to_list(self, key: str = None) -> List[Any]:
+        try:
+            if key in self.schema.names:
+                return self.table.column(key).to_pylist()
+            return self.table.to_pylist()
+        except Exception as e:
+            raise e
+
+    def to_jsonl(
+        self, path: str, compression: str = None, ensure_ascii: bool = False
+    ) -> str:
+        """
+        Saves the rows of the table to a JSON Lines file, without building the entries (see
+        `Dataset.to_jsonl`).
+        """
+        try:
+            return write_jsonl(
+                entries=(
+                    row
+                    for batch in self.table.to_batches(max_chunksize=BATCH_SIZE)
+                    for row in batch.to_pylist()
+                ),
+                path=path,
+                compression=compression,
+                ensure_ascii=ensure_ascii,
+            )
+        except Exception as e:
+            raise e
+
+    def to_dataset(self) -> "hf_dataset":
+        """
+        Wraps the table in a Hugging Face dataset, without copying it.
+        """
+        from datasets import Dataset as hf_dataset
+        from datasets.table import InMemoryTable
+
+        try:
+            return hf_dataset(InMemoryTable(self.table))
+        except Exception as e:
+            raise e
+
+    def to_arrow(self):
+        return self
+
+
+class ArrowQADataset(ArrowStore, QADataset):
+    """
+    A `QADataset` storing its pairs in Arrow columns (see `ArrowStore`), which takes a fraction of
+    the memory of `QAPair` objects and converts to a Hugging Face dataset without copying.
+    """
+
+    schema = QA_SCHEMA
+
+    def __init__(
+        self,
+        data: Union[
+            List[Dict[str, Union[str, int, bool]]], Dict[str, Union[str, int, bool]]
+        ] = None,
+        field: List[str] = None,
+        table: pa.Table = None,
+    ) -> None:
+        """
+        Args:
+            data (`List[Dict]` or `Dict[str, List]`, default to `None`):
+                The pairs, as rows or columns, like for `QADataset`.
+            field (`List[str]`, default to `None`):
+                The names of the fields of `data` (or of the columns of `table`), in the order of
+                `QA_FIELD`, which is the default.
+            table (`pyarrow.Table`, default to `None`):
+                The pairs, as a table, used instead of `data`.
+        """
+        field = QA_FIELD if field is None else field
+        table = to_table(data=table if table is not None else data, field=field, schema=self.schema)
+        self._init_store(
+            table.set_column(
+                5, self.schema.names[5], pc.utf8_upper(table.column(5))
+            )
+        )
+        self._keys: Dict[Tuple[str, str, str, int], int] = None
+        self._indexes: Dict[str, Dict[Any, Dict[str, None]]] = None
+
+    def _entry(self, row: Dict[str, Any]) -> QAPair:
+        return QAPair(
+            index=row.get(QA_FIELD[0]),
+            article=row.get(QA_FIELD[1]),
+            question=row.get(QA_FIELD[2]),
+            answer=row.get(QA_FIELD[3]),
+            start=row.get(QA_FIELD[4]),
+            ans_type=row.get(QA_FIELD[5]),
+            is_impossible=row.get(QA_FIELD[6], False),
+        )
+
+    @property
+    def keys(self) -> Dict[Tuple[str, str, str, int], int]:
+        """Access to the number of pairs of each key (see `QAPair.key`), built on first use."""
+        if self._keys is None:
+            table = self.table
+            self._keys = {}
+            for key in zip(*(table.column(name).to_pylist() for name in QA_FIELD[1:5])):
+                self._keys[key] = self._keys.get(key, 0) + 1
+        return self._keys
+
+    @property
+    def indexes(self) -> Dict[str, Dict[Any, Dict[str, None]]]:
+        """Access to the secondary indexes (see `QADataset.indexes`), built on first use."""
+        if self._indexes is None:
+            table = self.table
+            self._indexes = {name: {} for name in INDEXES}
+            columns = (QA_FIELD[0], QA_FIELD[1], QA_FIELD[5])
+            for row in zip(*(table.column(name).to_pylist() for name in columns)):
+                self._index(*row)
+        return self._indexes
+
+    def __contains__(self, value: QAPair) -> bool:
+        try:
+            return value.key in self.keys
+        except Exception as e:
+            raise e
+
+    def append(self, entry: QAPair):
+        try:
+            replaced = entry.id in self.positions
+            super().append(entry)
+            if replaced:
+                self._keys = None
+                self._indexes = None
+                return
+            if self._keys is not None:
+                self._keys[entry.key] = self._keys.get(entry.key, 0) + 1
+            if self._indexes is not None:
+                self._index(index=entry.id, article=entry.article, ans_type=entry.type)
+        except Exception as e:
+            raise e
+
+    def add(self, entry: QAPair) -> bool:
+        try:
+            if entry in self:
+                return False
+            self.append(entry)
+            return True
+        except Exception as e:
+            raise e
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = super().__getstate__()
+        state["_keys"] = None
+        state["_indexes"] = None
+        return state
+
+
+class ArrowDocument(ArrowStore, Document):
+    """
+    A `Document` storing its articles in Arrow columns (see `ArrowStore`). An `Article` is built on
+    each access, so the inverted index of its contexts is not kept between accesses.
+    """
+
+    schema = DOC_SCHEMA
+
+    def __init__(
+        self,
+        data: Union[
+            List[Dict[str, Union[str, List[str]]]], Dict[str, List[str]]
+        ] = None,
+        field: List[str] = None,
+        table: pa.Table = None,
+    ) -> None:
+        """
+        Args:
+            data (`List[Dict]` or `Dict[str, List]`, default to `None`):
+                The articles, as rows or columns, like for `Document`.
+            field (`List[str]`, default to `None`):
+                The names of the fields of `data` (or of the columns of `table`), in the order of
+                `DOC_FIELD`, which is the default.
+            table (`pyarrow.Table`, default to `None`):
+                The articles, as a table, used instead of `data`.
+        """
+        field = DOC_FIELD if field is None else field
+        self._init_store(
+            to_table(data=table if table is not None else data, field=field, schema=self.schema)
+        )
+
+    def _entry(self, row: Dict[str, Any]) -> Article:
+        return Article(
+            index=row.get(DOC_FIELD[0]),
+            title=row.get(DOC_FIELD[1]),
+            summary=row.get(DOC_FIELD[2]),
+            context=row.get(DOC_FIELD[3]),
+        )
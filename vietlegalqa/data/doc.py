@@ -1,8 +1,12 @@
 """IMPORTS"""
-from typing import Dict, Iterator, List, Union
+from typing import TYPE_CHECKING, Dict, Iterator, List, Sequence, Union
 
-from .utils import Entry, Dataset
-from .utils import DOC_FIELD as FIELD, DocField as Field
+from .utils import Entry, EntryDict, Dataset, DatasetView
+from .utils import DOC_FIELD as FIELD
+
+if TYPE_CHECKING:
+    from .arrow import ArrowDocument
+    from .index import ContextIndex
 
 
 class Article(Entry):
@@ -10,6 +14,11 @@ class Article(Entry):
     subclass of the Entry class, representing an element of a document dataset.
     """
 
+    __slots__ = ("_title", "_summary", "_context", "_context_index")
+    FIELDS = tuple(FIELD)
+    SLOTS = tuple(["_id", "_title", "_summary", "_context"])
+    DEFAULTS = dict({"_context_index": None})
+
     def __init__(
         self,
         index: str = None,
@@ -21,6 +30,23 @@ class Article(Entry):
         self._title = title
         self._summary = summary
         self._context = context
+        self._context_index = None
+
+    @classmethod
+    def from_dict(
+        cls, data: Dict[str, Union[str, List[str]]], field: List[str] = None
+    ) -> "Article":
+        """
+        Builds an article from a dictionary whose keys are given by `field`, in the order of
+        `DOC_FIELD`, which is the default.
+        """
+        field = FIELD if field is None else field
+        return cls(
+            index=data[field[0]],
+            title=data[field[1]],
+            summary=data[field[2]],
+            context=data[field[3]],
+        )
 
     @property
     def title(self):
@@ -51,52 +77,16 @@ class Article(Entry):
     def context(self, value):
         """Set the context of this entry."""
         self._context = value
+        self._context_index = None
 
-    def __call__(
-        self, key: str = None
-    ) -> Union[str, List[str], Dict[str, Union[str, List[str], None]], None]:
-        try:
-            match key:
-                case Field.id:
-                    return self.id
-                case Field.title:
-                    return self.title
-                case Field.summary:
-                    return self.summary
-                case Field.context:
-                    return self.context
-                case _:
-                    return self.to_dict()
-        except Exception as e:
-            raise e
-
-    def __getitem__(self, key: str) -> Union[str, List[str], None]:
-        try:
-            match key:
-                case Field.id:
-                    return self.id
-                case Field.title:
-                    return self.title
-                case Field.summary:
-                    return self.summary
-                case Field.context:
-                    return self.context
-                case _:
-                    return None
-        except Exception as e:
-            raise e
-
-    def to_list(self) -> List[Union[str, List[str], None]]:
-        try:
-            return list([self.id, self.title, self.summary, self.context])
-        except Exception as e:
-            raise e
+    @property
+    def context_index(self) -> "ContextIndex":
+        """Access to the syllable index of the contexts of this entry, built on first use."""
+        if self._context_index is None:
+            from .index import ContextIndex
 
-    def to_dict(self) -> Dict[str, Union[str, List[str], None]]:
-        try:
-            return dict({FIELD[idx]: field for idx, field in enumerate(self.to_list())})
-        except Exception as e:
-            raise e
+            self._context_index = ContextIndex(contexts=self.context or [])
+        return self._context_index
 
 
 class Document(Dataset):
@@ -112,24 +102,21 @@ class Document(Dataset):
         field: List[str] = None,
     ) -> None:
         super().__init__()
-        self.data: Dict[str, Article] = {}
+        self.data: Dict[str, Article] = EntryDict()
         try:
             match data:
                 case list():
                     for entry in data:
-                        self.data[entry[field[0]]] = Article(
-                            index=entry[field[0]],
-                            title=entry[field[1]],
-                            summary=entry[field[2]],
-                            context=entry[field[3]],
-                        )
+                        self._set(Article.from_dict(data=entry, field=field))
                 case dict():
                     for idx, index in enumerate(data[field[0]]):
-                        self.data[index] = Article(
-                            index=index,
-                            title=data[field[1]][idx],
-                            summary=data[field[2]][idx],
-                            context=data[field[3]][idx],
+                        self._set(
+                            Article(
+                                index=index,
+                                title=data[field[1]][idx],
+                                summary=data[field[2]][idx],
+                                context=data[field[3]][idx],
+                            )
                         )
                 case _:
                     pass
@@ -137,18 +124,14 @@ class Document(Dataset):
             raise e
 
     def __getitem__(
-        self, key: Union[str, int, slice]
-    ) -> Union[Article, list[Article], None]:
+        self, key: Union[str, int, slice, Sequence[int]]
+    ) -> Union[Article, DatasetView, None]:
         try:
             match key:
                 case str():
                     return self.data.get(key, Article())
-                case int():
-                    return list(self.data.values())[key]
-                case slice():
-                    return list(self.data.values())[key]
                 case _:
-                    return None
+                    return self._select(key)
         except Exception as e:
             raise e
 
@@ -160,13 +143,24 @@ class Document(Dataset):
 
     def append(self, entry: Article):
         try:
-            self.data[entry.id] = entry
+            self._set(entry)
         except Exception as e:
             raise e
 
     def extend(self, entries: List[Article]):
         try:
             for entry in entries:
-                self.data[entry.id] = entry
+                self._set(entry)
+        except Exception as e:
+            raise e
+
+    def to_arrow(self) -> "ArrowDocument":
+        """
+        Converts the dataset to an `ArrowDocument`, which stores its fields as Arrow columns.
+        """
+        from .arrow import ArrowDocument
+
+        try:
+            return ArrowDocument.from_entries(entries=self)
         except Exception as e:
             raise e
@@ -0,0 +1,120 @@
+"""IMPORTS"""
+import re
+from typing import Dict, List, Tuple
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def index_tokens(text: str) -> List[str]:
+    """
+    Split a text into the lower-cased syllables used as index terms.
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class ContextIndex:
+    """
+    An inverted index over the contexts of an article: a term-context incidence matrix, with a row
+    of bits per syllable (packed eight contexts to a byte) telling which contexts it occurs in. It
+    records presence only, not how many times a syllable occurs: a context scores a question by
+    the number of its tokens whose syllables all occur in it. Questions are scored with array
+    operations over the rows of their syllables, a whole batch of questions at once.
+    """
+
+    def __init__(self, contexts: List[str]) -> None:
+        """
+        Builds the index of `contexts`.
+
+        Args:
+            contexts (`List[str]`):
+                The contexts of the article, the position of each one being its ID.
+        """
+        self.size = len(contexts)
+        self.vocab: Dict[str, int] = {}
+
+        terms: List[int] = []
+        ctx_ids: List[int] = []
+        for ctx_id, ctx in enumerate(contexts):
+            for token in set(index_tokens(ctx)):
+                terms.append(self.vocab.setdefault(token, len(self.vocab)))
+                ctx_ids.append(ctx_id)
+
+        # The last row, of syllables absent from every context, stays empty.
+        incidence = np.zeros((len(self.vocab) + 1, self.size), dtype=bool)
+        incidence[terms, ctx_ids] = True
+        self.bits: np.ndarray = np.packbits(incidence, axis=1, bitorder="little")
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _token_rows(self, tokens: List[str]) -> Tuple[np.ndarray, List[int]]:
+        """
+        The rows of the syllables of `tokens`, concatenated, and the offset of each token in them.
+        A token without syllables gets the empty row.
+        """
+        absent = len(self.vocab)
+        rows: List[int] = []
+        starts: List[int] = []
+        for token in tokens:
+            starts.append(len(rows))
+            syllables = index_tokens(token)
+            if len(syllables) == 0:
+                rows.append(absent)
+            else:
+                rows.extend(self.vocab.get(syllable, absent) for syllable in syllables)
+        return np.array(rows, dtype=np.int64), starts
+
+    def _matches(self, tokens: List[str]) -> np.ndarray:
+        """
+        The packed bits of the contexts containing every syllable of each token, one row per token.
+        """
+        rows, starts = self._token_rows(tokens=tokens)
+        return np.bitwise_and.reduceat(self.bits[rows], starts, axis=0)
+
+    def lookup(self, token: str) -> np.ndarray:
+        """
+        Returns the IDs of the contexts containing every syllable of `token`.
+        """
+        matches = np.unpackbits(
+            self._matches(tokens=[token])[0], count=self.size, bitorder="little"
+        )
+        return np.flatnonzero(matches).astype(np.int32)
+
+    def score_batch(self, queries: List[List[str]]) -> np.ndarray:
+        """
+        Returns, for every query and every context, the number of the tokens of the query whose
+        syllables all occur in the context, as a `(len(queries), len(self))` array.
+        """
+        tokens: List[str] = []
+        starts: List[int] = []
+        for query in queries:
+            starts.append(len(tokens))
+            # An empty string has no syllables, so an empty query scores 0 everywhere.
+            tokens.extend(query if len(query) > 0 else [""])
+        if len(tokens) == 0:
+            return np.zeros((0, self.size), dtype=np.int32)
+
+        matches = np.unpackbits(
+            self._matches(tokens=tokens), axis=1, count=self.size, bitorder="little"
+        )
+        return np.add.reduceat(matches, starts, axis=0, dtype=np.int32)
+
+    def score(self, tokens: List[str]) -> np.ndarray:
+        """
+        Returns, for every context, the number of `tokens` it contains.
+        """
+        return self.score_batch(queries=[tokens])[0]
+
+    def top_batch(self, queries: List[List[str]]) -> np.ndarray:
+        """
+        Returns, for every query, the ID of the context containing the most of its tokens (the
+        first one on ties).
+        """
+        return np.argmax(self.score_batch(queries=queries), axis=1)
+
+    def top(self, tokens: List[str]) -> int:
+        """
+        Returns the ID of the context containing the most `tokens` (the first one on ties).
+        """
+        return int(self.top_batch(queries=[tokens])[0])
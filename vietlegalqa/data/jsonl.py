@@ -0,0 +1,163 @@
+"""IMPORTS"""
+import gzip
+import io
+import json
+import os
+from typing import IO, Any, Dict, Iterable, Iterator, List
+
+from .utils import get_extension
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIONS: List[str] = list(["gzip", "zstd"])
+SUFFIXES: Dict[str, str] = dict({"gzip": ".gz", "zstd": ".zst"})
+CHUNK_SIZE = 1000
+
+
+def dumps(obj: Any, ensure_ascii: bool = False) -> bytes:
+    """
+    Encodes `obj` as a line of UTF-8 JSON, with `orjson` when it is installed. As `orjson` cannot
+    escape non-ASCII characters, the standard encoder is used when `ensure_ascii` is set.
+    """
+    if orjson is not None and not ensure_ascii:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=ensure_ascii).encode("utf-8")
+
+
+def loads(line: bytes) -> Any:
+    """
+    Decodes a line of UTF-8 JSON, with `orjson` when it is installed.
+    """
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+def compression_of(path: str) -> str:
+    """
+    The compression of a file, from the suffix of its name: `"gzip"` (`.gz`), `"zstd"` (`.zst`)
+    or `None`.
+    """
+    for compression, suffix in SUFFIXES.items():
+        if path.endswith(suffix):
+            return compression
+    return None
+
+
+def jsonl_path(path: str, compression: str = None) -> str:
+    """
+    The name of the JSON Lines file `path` with the extension of `compression`, e.g.
+    `"qa.jsonl.gz"` for `"qa"` and `"gzip"`.
+    """
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ValueError(f"compression must be one of {COMPRESSIONS}, got {compression}")
+
+    suffix = SUFFIXES[compression] if compression is not None else ""
+    path = path.strip()
+    if len(suffix) > 0 and path.endswith(suffix):
+        path = path[: -len(suffix)]
+    return get_extension(filename=path, filetype="jsonl") + suffix
+
+
+def jsonl_files(path: str) -> List[str]:
+    """
+    The JSON Lines files at `path`: every shard of a directory (as written by `ShardWriter`), in
+    file name order, or the file itself. A file name given without its extension is looked up
+    uncompressed first, then with each compression.
+    """
+    if os.path.isdir(path):
+        return list(
+            os.path.join(path, name)
+            for name in sorted(os.listdir(path))
+            if jsonl_path(path=name, compression=compression_of(name)) == name
+        )
+    if os.path.isfile(path):
+        return list([path])
+    for compression in [None, *COMPRESSIONS]:
+        candidate = jsonl_path(path=path, compression=compression)
+        if os.path.isfile(candidate):
+            return list([candidate])
+    return list([jsonl_path(path=path)])
+
+
+def open_jsonl(path: str, mode: str = "rb") -> IO[bytes]:
+    """
+    Opens a JSON Lines file in binary mode (`"rb"`, `"wb"` or `"ab"`), compressed according to the
+    suffix of its name. Appending to a compressed file adds a gzip member or a zstd frame, which
+    readers decode as if the file had been written at once.
+    """
+    match compression_of(path):
+        case None:
+            return open(file=path, mode=mode)
+        case "gzip":
+            return gzip.open(filename=path, mode=mode, compresslevel=6)
+        case "zstd":
+            if zstandard is None:
+                raise ImportError("zstd compression requires the zstandard package")
+            file = open(file=path, mode=mode)
+            if mode.startswith("r"):
+                return io.BufferedReader(
+                    zstandard.ZstdDecompressor().stream_reader(
+                        file, read_across_frames=True, closefd=True
+                    )
+                )
+            return zstandard.ZstdCompressor().stream_writer(file, closefd=True)
+
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Generate the entries of a JSON Lines file, or of every shard of a directory, one line at a
+    time, so that only the current entry is kept in memory.
+
+    Yields:
+        `Dict[str, Any]`
+    """
+    for shard in jsonl_files(path=path):
+        with open_jsonl(path=shard, mode="rb") as file:
+            for line in file:
+                if line.strip():
+                    yield loads(line)
+
+
+def write_jsonl(
+    entries: Iterable[Dict[str, Any]],
+    path: str,
+    compression: str = None,
+    ensure_ascii: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+) -> str:
+    """
+    Writes `entries` to a JSON Lines file, encoding and writing them `chunk_size` at a time.
+
+    Args:
+        entries (`Iterable[Dict[str, Any]]`):
+            The entries, consumed once.
+        path (`str`):
+            The name of the file, completed with the extension of the format and compression.
+        compression (`str`, default to `None`):
+            `"gzip"`, `"zstd"` or `None`.
+        ensure_ascii (`bool`, default to `False`):
+            Whether non-ASCII characters are escaped in the output.
+        chunk_size (`int`, default to `1000`):
+            The number of entries encoded before they are written.
+
+    Returns:
+        `str`: the name of the file written.
+    """
+    path = jsonl_path(path=path, compression=compression)
+    with open_jsonl(path=path, mode="wb") as file:
+        chunk: List[bytes] = []
+        for entry in entries:
+            chunk.append(dumps(obj=entry, ensure_ascii=ensure_ascii))
+            if len(chunk) >= chunk_size:
+                file.write(b"\n".join(chunk) + b"\n")
+                chunk = []
+        if len(chunk) > 0:
+            file.write(b"\n".join(chunk) + b"\n")
+    return path
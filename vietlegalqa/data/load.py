@@ -1,12 +1,107 @@
 """IMPORTS"""
 import json
 import pickle
-from typing import Any, List, Tuple, Union
-from datasets import load_dataset
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Union
 
-from .doc import Document
-from .qa import QADataset
-from .utils import DOC_FIELD, QA_FIELD, get_extension
+from .doc import Article, Document
+from .jsonl import iter_jsonl
+from .qa import QAPair, QADataset
+from .utils import DOC_FIELD, QA_FIELD, Dataset, Entry, get_extension
+
+BACKENDS: List[str] = list(["dict", "arrow"])
+
+
+def read_jsonl(path: str) -> List[Dict[str, Any]]:
+    """
+    Reads the entries of a JSON Lines file, or of every shard of a directory (as written by
+    `ShardWriter`) in file name order. Files may be gzip or zstd compressed (see `iter_jsonl`).
+    """
+    try:
+        return list(iter_jsonl(path=path))
+    except Exception as e:
+        raise e
+
+
+def iter_document(path: str, field: List[str] = None) -> Iterator[Article]:
+    """
+    Generate the articles of a JSON Lines file or directory one at a time, for a single pass over
+    it without building a `Document`.
+
+    Yields:
+        `Article`
+    """
+    field = DOC_FIELD if field is None else field
+    for entry in iter_jsonl(path=path):
+        yield Article.from_dict(data=entry, field=field)
+
+
+def iter_qa(path: str, field: List[str] = None) -> Iterator[QAPair]:
+    """
+    Generate the pairs of a JSON Lines file or directory one at a time, for a single pass over it
+    without building a `QADataset`.
+
+    Yields:
+        `QAPair`
+    """
+    field = QA_FIELD if field is None else field
+    for entry in iter_jsonl(path=path):
+        yield QAPair.from_dict(data=entry, field=field)
+
+
+def from_entries(cls: type, entries: Iterable[Entry], backend: str = "dict") -> Dataset:
+    """
+    Builds a dataset of class `cls` from entries as they are generated, so that the rows they are
+    read from are never all in memory at once.
+    """
+    if backend == "arrow":
+        return cls.from_entries(entries=entries)
+    dataset = cls()
+    dataset.extend(entries)
+    return dataset
+
+
+def dataset_class(cls: type, arrow_cls: str, backend: str = "dict") -> type:
+    """
+    Returns `cls`, or the Arrow-backed class named `arrow_cls` when `backend` is `"arrow"`.
+    """
+    match backend:
+        case "dict":
+            return cls
+        case "arrow":
+            from . import arrow
+
+            return getattr(arrow, arrow_cls)
+        case _:
+            raise ValueError(f"backend must be one of {BACKENDS}, got {backend}")
+
+
+def from_hf(
+    dataset: Any, field: List[str], cls: type, arrow_cls: str, backend: str = "dict"
+) -> Union[Document, QADataset]:
+    """
+    Builds a dataset of class `cls`, or of its Arrow-backed counterpart `arrow_cls`, from a Hugging
+    Face dataset. The Arrow-backed datasets share its table instead of copying the rows.
+    """
+    cls = dataset_class(cls=cls, arrow_cls=arrow_cls, backend=backend)
+    if backend == "arrow":
+        if dataset._indices is not None:
+            dataset = dataset.flatten_indices()
+        return cls(table=dataset.data.table, field=field)
+    return cls(data=dataset.to_list(), field=field)
+
+
+def select_hf(
+    path: str, split: str, select: Union[int, Tuple[int, int], Tuple[int, int, int]] = None
+) -> Any:
+    from datasets import load_dataset
+
+    match select:
+        case None:
+            return load_dataset(path)[split]
+        case int():
+            return load_dataset(path)[split].select(range(select))
+        case tuple():
+            return load_dataset(path, split=split).select(range(*select))
 
 
 def load_document_hf(
@@ -14,40 +109,25 @@ def load_document_hf(
     split: str = "train",
     field: List[str] = None,
     select: Union[int, Tuple[int, int], Tuple[int, int, int]] = None,
+    backend: str = "dict",
 ) -> Document:
     try:
-        match select:
-            case None:
-                return Document(data=load_dataset(path)[split].to_list(), field=field)
-            case int():
-                return Document(
-                    data=load_dataset(path)[split].select(range(select)).to_list(),
-                    field=field,
-                )
-            case tuple():
-                return (
-                    Document(
-                        data=load_dataset(path, split=split)
-                        .select(range(select[0], select[1]))
-                        .to_list(),
-                        field=field,
-                    )
-                    if len(select) == 2
-                    else Document(
-                        data=load_dataset(path, split=split)
-                        .select(range(select[0], select[1], select[2]))
-                        .to_list(),
-                        field=field,
-                    )
-                )
+        return from_hf(
+            dataset=select_hf(path=path, split=split, select=select),
+            field=field,
+            cls=Document,
+            arrow_cls="ArrowDocument",
+            backend=backend,
+        )
     except Exception as e:
         raise e
 
 
 def load_document(
-    path: str, filetype: str = None, field: List[str] = None
+    path: str, filetype: str = None, field: List[str] = None, backend: str = "dict"
 ) -> Union[Document, Any, None]:
     try:
+        cls = dataset_class(cls=Document, arrow_cls="ArrowDocument", backend=backend)
         field = DOC_FIELD if field is None else field
         match filetype:
             case "json":
@@ -56,7 +136,11 @@ def load_document(
                     mode="r",
                     encoding="utf-8",
                 ) as file:
-                    return Document(data=json.load(fp=file), field=field)
+                    return cls(data=json.load(fp=file), field=field)
+            case "jsonl":
+                return from_entries(
+                    cls=cls, entries=iter_document(path=path, field=field), backend=backend
+                )
             case "pickle":
                 with open(
                     file=get_extension(filename=path, filetype="pickle"),
@@ -72,40 +156,25 @@ def load_qa_hf(
     split: str = "train",
     field: List[str] = None,
     select: Union[int, Tuple[int, int], Tuple[int, int, int]] = None,
+    backend: str = "dict",
 ) -> QADataset:
     try:
-        match select:
-            case None:
-                return QADataset(data=load_dataset(path)[split].to_list(), field=field)
-            case int():
-                return QADataset(
-                    data=load_dataset(path)[split].select(range(select)).to_list(),
-                    field=field,
-                )
-            case tuple():
-                return (
-                    QADataset(
-                        data=load_dataset(path, split=split)
-                        .select(range(select[0], select[1]))
-                        .to_list(),
-                        field=field,
-                    )
-                    if len(select) == 2
-                    else QADataset(
-                        data=load_dataset(path, split=split)
-                        .select(range(select[0], select[1], select[2]))
-                        .to_list(),
-                        field=field,
-                    )
-                )
+        return from_hf(
+            dataset=select_hf(path=path, split=split, select=select),
+            field=field,
+            cls=QADataset,
+            arrow_cls="ArrowQADataset",
+            backend=backend,
+        )
     except Exception as e:
         raise e
 
 
 def load_qa(
-    path: str, filetype: str = None, field: List[str] = None
+    path: str, filetype: str = None, field: List[str] = None, backend: str = "dict"
 ) -> Union[QADataset, Any, None]:
     try:
+        cls = dataset_class(cls=QADataset, arrow_cls="ArrowQADataset", backend=backend)
         field = QA_FIELD if field is None else field
         match filetype:
             case "json":
@@ -114,7 +183,11 @@ def load_qa(
                     mode="r",
                     encoding="utf-8",
                 ) as file:
-                    return QADataset(data=json.load(fp=file), field=field)
+                    return cls(data=json.load(fp=file), field=field)
+            case "jsonl":
+                return from_entries(
+                    cls=cls, entries=iter_qa(path=path, field=field), backend=backend
+                )
             case "pickle":
                 with open(
                     file=get_extension(filename=path, filetype="pickle"),
@@ -1,12 +1,67 @@
 """IMPORTS"""
-from typing import Dict, Iterator, List, Union
+import sys
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 from .doc import Article, Document
-from .utils import Entry, Dataset
-from .utils import QA_FIELD as FIELD, QAField as Field
+from .utils import Entry, EntryDict, Dataset, DatasetView
+from .utils import QA_FIELD as FIELD
+
+if TYPE_CHECKING:
+    from .arrow import ArrowQADataset
+
+# The secondary indexes of `QADataset`, keyed by article ID, by `(article ID, context ID)` and by
+# answer type.
+INDEXES: List[str] = list(["article", "context", "type"])
+
+
+def split_article(article: str) -> Tuple[str, int]:
+    """
+    Splits the `article` field of a pair, `"{article_id}__{ctx_id}"`, into the ID of the article
+    and the position of the context in it. The context ID is `None` when the field has no valid
+    context part, the whole field being then taken as the article ID.
+    """
+    if article is None:
+        return None, None
+    article_id, sep, ctx_id = article.rpartition("__")
+    if len(sep) == 0 or not ctx_id.isdigit():
+        return article, None
+    return article_id, int(ctx_id)
+
+
+def index_keys(
+    article: str, ans_type: str
+) -> Tuple[str, Union[Tuple[str, int], None], str]:
+    """
+    The keys of a pair in each of the secondary indexes, in the order of `INDEXES`, `None` when
+    the pair is absent from an index.
+    """
+    article_id, ctx_id = split_article(article)
+    return article_id, (article_id, ctx_id) if ctx_id is not None else None, ans_type
 
 
 class QAPair(Entry):
+    """
+    A question-answer pair. Its `article`, `question`, `answer` and `start` (its `key`, which it is
+    hashed on) and its `type` are read-only, so that the datasets storing it stay consistent.
+    """
+
+    __slots__ = ("_article", "_question", "_answer", "_start", "_type", "_is_impossible")
+    FIELDS = tuple(FIELD)
+    SLOTS = tuple(
+        ["_id", "_article", "_question", "_answer", "_start", "_type", "_is_impossible"]
+    )
+    DEFAULTS = dict({"_is_impossible": False})
+
     def __init__(
         self,
         index: str = None,
@@ -22,59 +77,51 @@ class QAPair(Entry):
         self._question = question
         self._answer = answer
         self._start = start
-        self._type = ans_type.upper()
+        self._type = sys.intern(ans_type.upper()) if ans_type is not None else None
         self._is_impossible = is_impossible
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Union[str, int, bool]], field: List[str] = None) -> "QAPair":
+        """
+        Builds a pair from a dictionary whose keys are given by `field`, in the order of
+        `QA_FIELD`, which is the default.
+        """
+        field = FIELD if field is None else field
+        return cls(
+            index=data[field[0]],
+            article=data[field[1]],
+            question=data[field[2]],
+            answer=data[field[3]],
+            start=data[field[4]],
+            ans_type=data[field[5]],
+            is_impossible=data[field[6]],
+        )
+
     @property
     def article(self):
         """Access to the article of this entry."""
         return self._article
 
-    @article.setter
-    def article(self, value):
-        """Set the article of this entry."""
-        self._article = value
-
     @property
     def question(self):
         """Access to the question of this entry."""
         return self._question
 
-    @question.setter
-    def question(self, value):
-        """Set the question of this entry."""
-        self._question = value
-
     @property
     def answer(self):
         """Access to the answer of this entry."""
         return self._answer
 
-    @answer.setter
-    def answer(self, value):
-        """Set the answer of this entry."""
-        self._answer = value
-
     @property
     def start(self):
         """Access to the start of this entry."""
         return self._start
 
-    @start.setter
-    def start(self, value):
-        """Set the start of this entry."""
-        self._start = value
-
     @property
     def type(self):
         """Access to the type of this entry."""
         return self._type
 
-    @type.setter
-    def type(self, value):
-        """Set the summary of this entry."""
-        self._type = value
-
     @property
     def is_impossible(self):
         """Access to the is_impossible of this entry."""
@@ -85,49 +132,20 @@ class QAPair(Entry):
         """Set the context of this entry."""
         self._is_impossible = value
 
-    def __call__(self, key: str = None) -> Union[str, int, bool, Dict, None]:
-        try:
-            match key:
-                case Field.id:
-                    return self.id
-                case Field.article:
-                    return self.article
-                case Field.question:
-                    return self.question
-                case Field.answer:
-                    return self.answer
-                case Field.start:
-                    return self.start
-                case Field.type:
-                    return self.type
-                case Field.is_impossible:
-                    return self.is_impossible
-                case _:
-                    return self.to_dict()
-        except Exception as e:
-            raise e
+    @property
+    def article_id(self) -> str:
+        """The ID of the article of this entry, i.e. its `article` without the context ID."""
+        return split_article(self._article)[0]
 
-    def __getitem__(self, key: str = None) -> Union[str, int, bool, None]:
-        try:
-            match key:
-                case Field.id:
-                    return self.id
-                case Field.article:
-                    return self.article
-                case Field.question:
-                    return self.question
-                case Field.answer:
-                    return self.answer
-                case Field.start:
-                    return self.start
-                case Field.type:
-                    return self.type
-                case Field.is_impossible:
-                    return self.is_impossible
-                case _:
-                    return None
-        except Exception as e:
-            raise e
+    @property
+    def ctx_id(self) -> int:
+        """The position of the context of this entry in its article, `None` if unknown."""
+        return split_article(self._article)[1]
+
+    @property
+    def key(self) -> Tuple[str, str, str, int]:
+        """The fields identifying this entry: `(article, question, answer, start)`."""
+        return (self._article, self._question, self._answer, self._start)
 
     def __eq__(self, __value: object) -> bool:
         try:
@@ -144,17 +162,13 @@ class QAPair(Entry):
 
     def __ne__(self, __value: object) -> bool:
         try:
-            if isinstance(__value, QAPair):
-                return bool(
-                    self.article != __value.article
-                    and self.question != __value.question
-                    and self.answer != __value.answer
-                    and self.start != __value.start
-                )
-            return False
+            return not self.__eq__(__value)
         except Exception as e:
             raise e
 
+    def __hash__(self) -> int:
+        return hash(self.key)
+
     def __lt__(self, __value: object) -> bool:
         try:
             if isinstance(__value, QAPair):
@@ -231,28 +245,6 @@ class QAPair(Entry):
         except Exception as e:
             raise e
 
-    def to_list(self) -> List[Union[str, int, bool, None]]:
-        try:
-            return list(
-                [
-                    self.id,
-                    self.article,
-                    self.question,
-                    self.answer,
-                    self.start,
-                    self.type,
-                    self.is_impossible,
-                ]
-            )
-        except Exception as e:
-            raise e
-
-    def to_dict(self) -> Dict[str, Union[str, int, bool, None]]:
-        try:
-            return dict({FIELD[idx]: field for idx, field in enumerate(self.to_list())})
-        except Exception as e:
-            raise e
-
     def get_article(self, document: Document) -> Article:
         """
         The function `get_article` takes a `Document` object and returns the `Article` object associated
@@ -266,10 +258,24 @@ class QAPair(Entry):
           The code is returning an article object from the given document.
         """
         try:
-            return document[self.article]
+            return document[self.article_id]
         except Exception as e:
             raise (e)
 
+    def get_context(self, document: Document) -> Union[str, None]:
+        """
+        Returns the text of the context of this entry in `document`, or `None` when `document`
+        has no such article or context.
+        """
+        try:
+            article_id, ctx_id = split_article(self._article)
+            if ctx_id is None:
+                return None
+            context = document[article_id].context
+            return context[ctx_id] if context is not None and ctx_id < len(context) else None
+        except Exception as e:
+            raise e
+
 
 class QADataset(Dataset):
     def __init__(
@@ -280,30 +286,26 @@ class QADataset(Dataset):
         field: List[str] = None,
     ) -> None:
         super().__init__()
-        self.data: Dict[str, QAPair] = {}
+        self.data: Dict[str, QAPair] = EntryDict()
+        self._keys: Dict[Tuple[str, str, str, int], int] = {}
+        self._indexes: Dict[str, Dict[Any, Dict[str, None]]] = None
         try:
             match data:
                 case list():
                     for entry in data:
-                        self.data[entry[field[0]]] = QAPair(
-                            index=entry[field[0]],
-                            article=entry[field[1]],
-                            question=entry[field[2]],
-                            answer=entry[field[3]],
-                            start=entry[field[4]],
-                            ans_type=entry[field[5]],
-                            is_impossible=entry[field[6]],
-                        )
+                        self._insert(QAPair.from_dict(data=entry, field=field))
                 case dict():
                     for idx, index in enumerate(data[field[0]]):
-                        self.data[index] = QAPair(
-                            index=index,
-                            article=data[field[1]][idx],
-                            question=data[field[2]][idx],
-                            answer=data[field[3]][idx],
-                            start=data[field[4]][idx],
-                            ans_type=data[field[5]][idx],
-                            is_impossible=data[field[6]][idx],
+                        self._insert(
+                            QAPair(
+                                index=index,
+                                article=data[field[1]][idx],
+                                question=data[field[2]][idx],
+                                answer=data[field[3]][idx],
+                                start=data[field[4]][idx],
+                                ans_type=data[field[5]][idx],
+                                is_impossible=data[field[6]][idx],
+                            )
                         )
                 case _:
                     pass
@@ -311,18 +313,14 @@ class QADataset(Dataset):
             raise e
 
     def __getitem__(
-        self, key: Union[str, int, slice]
-    ) -> Union[QAPair, list[QAPair], None]:
+        self, key: Union[str, int, slice, Sequence[int]]
+    ) -> Union[QAPair, DatasetView, None]:
         try:
             match key:
                 case str():
                     return self.data.get(key, QAPair())
-                case int():
-                    return list(self.data.values())[key]
-                case slice():
-                    return list(self.data.values())[key]
                 case _:
-                    return None
+                    return self._select(key)
         except Exception as e:
             raise e
 
@@ -334,25 +332,105 @@ class QADataset(Dataset):
 
     def __contains__(self, value: QAPair) -> bool:
         try:
-            return (
-                value.article in self.to_list(key="article")
-                and value.question in self.to_list(key="question")
-                and value.answer in self.to_list(key="answer")
-                and value.start in self.to_list(key="start")
-            )
+            self._sync()
+            return value.key in self._keys
         except Exception as e:
             raise e
 
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._indexes = None
+
+    def _sync(self) -> None:
+        """
+        Rebuild the count of each key, and drop the secondary indexes, if `data` has been written
+        to directly or assigned since they were last updated.
+        """
+        if self._stale("_keys_synced"):
+            self._keys = {}
+            for entry in self.data.values():
+                self._keys[entry.key] = self._keys.get(entry.key, 0) + 1
+            self._indexes = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_indexes"] = None
+        return state
+
+    @property
+    def indexes(self) -> Dict[str, Dict[Any, Dict[str, None]]]:
+        """
+        Access to the secondary indexes: for each name of `INDEXES`, the IDs of the pairs under
+        each key of the index, as the keys of a dictionary in the order the pairs were stored.
+        They are built on first use, then kept up to date as pairs are stored.
+        """
+        self._sync()
+        if self._indexes is None:
+            self._indexes = {name: {} for name in INDEXES}
+            for entry in self.data.values():
+                self._index(index=entry.id, article=entry.article, ans_type=entry.type)
+        return self._indexes
+
+    def _index(self, index: str, article: str, ans_type: str, remove: bool = False) -> None:
+        for name, key in zip(INDEXES, index_keys(article=article, ans_type=ans_type)):
+            if key is None:
+                continue
+            ids = self._indexes[name].setdefault(key, {})
+            if not remove:
+                ids[index] = None
+                continue
+            ids.pop(index, None)
+            if len(ids) == 0:
+                del self._indexes[name][key]
+
+    def _insert(self, entry: QAPair) -> None:
+        """
+        Store `entry` under its ID and keep the count of its key and the secondary indexes up to
+        date, replacing the entry that had the same ID, if any.
+        """
+        self._sync()
+        previous = self.data.get(entry.id)
+        if previous is not None:
+            count = self._keys[previous.key] - 1
+            if count == 0:
+                del self._keys[previous.key]
+            else:
+                self._keys[previous.key] = count
+        self._set(entry)
+        self._keys[entry.key] = self._keys.get(entry.key, 0) + 1
+        if self._indexes is not None:
+            if previous is not None:
+                self._index(
+                    index=previous.id, article=previous.article, ans_type=previous.type, remove=True
+                )
+            self._index(index=entry.id, article=entry.article, ans_type=entry.type)
+
     def append(self, entry: QAPair):
         try:
-            self.data[entry.id] = entry
+            self._insert(entry)
         except Exception as e:
             raise e
 
     def extend(self, entries: List[QAPair]):
         try:
             for entry in entries:
-                self.data[entry.id] = entry
+                self._insert(entry)
+        except Exception as e:
+            raise e
+
+    def add(self, entry: QAPair) -> bool:
+        """
+        Append `entry` unless a pair with the same article, question, answer and start is already
+        in the dataset.
+
+        Returns:
+            `bool`: whether `entry` was added.
+        """
+        try:
+            if entry in self:
+                return False
+            self._insert(entry)
+            return True
         except Exception as e:
             raise e
 
@@ -384,8 +462,88 @@ class QADataset(Dataset):
         except Exception as e:
             raise e
 
-    def get_article(self, index: str, document: Document) -> Article:
+    def get_pairs(
+        self, article: str = None, ctx_id: int = None, ans_type: str = None
+    ) -> List[QAPair]:
+        """
+        Returns the pairs of an article, of one of its contexts and/or of an answer type, in the
+        order they were stored, using the secondary indexes instead of scanning the dataset.
+
+        Args:
+            article (`str`, default to `None`):
+                The ID of the article, without the context ID.
+            ctx_id (`int`, default to `None`):
+                The position of the context in the article. Requires `article`.
+            ans_type (`str`, default to `None`):
+                The answer type, in any case.
+
+        Returns:
+            `List[QAPair]`
+        """
+        try:
+            if ctx_id is not None and article is None:
+                raise ValueError("ctx_id requires article")
+
+            indexes = self.indexes
+            selected: List[Dict[str, None]] = []
+            if ctx_id is not None:
+                selected.append(indexes["context"].get((article, ctx_id), {}))
+            elif article is not None:
+                selected.append(indexes["article"].get(article, {}))
+            if ans_type is not None:
+                selected.append(indexes["type"].get(ans_type.upper(), {}))
+            if len(selected) == 0:
+                return list(self)
+
+            selected.sort(key=len)
+            ids = selected[0]
+            for other in selected[1:]:
+                ids = list(index for index in ids if index in other)
+            return list(self[index] for index in ids)
+        except Exception as e:
+            raise e
+
+    def get_article(self, index: Union[str, QAPair], document: Document) -> Article:
+        """
+        Returns the article of a pair, given as an ID or as a `QAPair`, from `document`.
+        """
+        try:
+            pair = self[index] if isinstance(index, str) else index
+            return document[pair.article_id]
+        except Exception as e:
+            raise e
+
+    def get_context(self, index: Union[str, QAPair], document: Document) -> Union[str, None]:
+        """
+        Returns the text of the context of a pair, given as an ID or as a `QAPair`, from
+        `document`, or `None` when `document` has no such article or context.
+        """
+        try:
+            pair = self[index] if isinstance(index, str) else index
+            return pair.get_context(document=document)
+        except Exception as e:
+            raise e
+
+    def get_contexts(
+        self, document: Document, pairs: Iterable[Union[str, QAPair]] = None
+    ) -> List[Union[str, None]]:
+        """
+        Returns the text of the context of each of `pairs` (IDs or `QAPair`s, every pair of the
+        dataset by default) from `document`, `None` for those it does not have.
+        """
+        try:
+            pairs = self if pairs is None else pairs
+            return list(self.get_context(index=pair, document=document) for pair in pairs)
+        except Exception as e:
+            raise e
+
+    def to_arrow(self) -> "ArrowQADataset":
+        """
+        Converts the dataset to an `ArrowQADataset`, which stores its fields as Arrow columns.
+        """
+        from .arrow import ArrowQADataset
+
         try:
-            return document[self.data[index]]
+            return ArrowQADataset.from_entries(entries=self)
         except Exception as e:
             raise e
@@ -0,0 +1,163 @@
+"""IMPORTS"""
+import os
+from typing import Any, Dict, List, Union
+
+from .jsonl import compression_of, dumps, jsonl_path, open_jsonl
+from .utils import Entry
+
+
+class ShardWriter:
+    """
+    Writes entries to rotating JSON Lines shards (`<prefix>_00000.jsonl`, `<prefix>_00001.jsonl`...)
+    with a bounded in-memory buffer, so the memory used does not grow with the number of entries.
+    Compressed shards (`.jsonl.gz`, `.jsonl.zst`) get a gzip member or zstd frame per flush.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        prefix: str = "shard",
+        shard_size: int = 100000,
+        buffer_size: int = 1000,
+        ensure_ascii: bool = False,
+        state: Dict[str, Any] = None,
+        compression: str = None,
+    ) -> None:
+        """
+        Args:
+            directory (`str`):
+                The directory the shards are written to. It is created if needed.
+            prefix (`str`, default to `"shard"`):
+                The prefix of the shard file names.
+            shard_size (`int`, default to `100000`):
+                The number of entries of a shard before the writer moves to the next one.
+            buffer_size (`int`, default to `1000`):
+                The number of entries kept in memory before they are written to disk.
+            ensure_ascii (`bool`, default to `False`):
+                Whether non-ASCII characters are escaped in the output.
+            state (`Dict[str, Any]`, default to `None`):
+                The `state()` of a previous writer to resume from. Its shards are truncated back to
+                their recorded size and shards written after it are removed. Without it, every
+                shard of `prefix` already in `directory` is removed.
+            compression (`str`, default to `None`):
+                `"gzip"`, `"zstd"` (which requires the `zstandard` package) or `None`.
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        self.directory = directory
+        self.prefix = prefix
+        self.shard_size = shard_size
+        self.buffer_size = buffer_size
+        self.ensure_ascii = ensure_ascii
+        self.compression = compression
+        self.suffix = jsonl_path(path="", compression=compression)
+
+        self.shards: List[str] = []
+        self.count = 0
+        self._shard_count = 0
+        self._buffer: List[bytes] = []
+
+        if state is not None:
+            self._restore(state=state)
+        else:
+            self._remove_stale()
+
+    def __enter__(self) -> "ShardWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _restore(self, state: Dict[str, Any]) -> None:
+        try:
+            self.shards = list(
+                os.path.join(self.directory, name) for name in state["shards"]
+            )
+            for shard, size in zip(self.shards, state["sizes"]):
+                with open(file=shard, mode="r+b") as file:
+                    file.truncate(size)
+        except Exception as e:
+            raise e
+
+        self._remove_stale()
+        self.count = state["count"]
+        self._shard_count = state["shard_count"]
+
+    def _remove_stale(self) -> None:
+        # Shards of `prefix` that are not this writer's, whatever their compression, would
+        # otherwise be read along with its own ones when the directory is loaded.
+        try:
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if (
+                    name.startswith(f"{self.prefix}_")
+                    and jsonl_path(path=name, compression=compression_of(name)) == name
+                    and path not in self.shards
+                ):
+                    os.remove(path)
+        except Exception as e:
+            raise e
+
+    def state(self) -> Dict[str, Any]:
+        """
+        Flushes the buffer and returns what is needed to resume writing from this point.
+        """
+        self.flush()
+        return dict(
+            {
+                "shards": [os.path.basename(shard) for shard in self.shards],
+                "sizes": [os.path.getsize(shard) for shard in self.shards],
+                "count": self.count,
+                "shard_count": self._shard_count,
+            }
+        )
+
+    def shard_path(self, shard_id: int) -> str:
+        """The path of the shard numbered `shard_id`."""
+        return os.path.join(self.directory, f"{self.prefix}_{shard_id:05d}{self.suffix}")
+
+    def write(self, entry: Union[Entry, Dict]) -> None:
+        """
+        Adds an entry (or its dictionary) to the current shard.
+        """
+        if len(self.shards) == 0 or self._shard_count >= self.shard_size:
+            self.flush()
+            self.shards.append(self.shard_path(shard_id=len(self.shards)))
+            self._shard_count = 0
+            with open(file=self.shards[-1], mode="wb"):
+                pass
+
+        self._buffer.append(
+            dumps(
+                obj=entry.to_dict() if isinstance(entry, Entry) else entry,
+                ensure_ascii=self.ensure_ascii,
+            )
+        )
+        self._shard_count += 1
+        self.count += 1
+
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes the buffered entries to the current shard.
+        """
+        if len(self._buffer) == 0:
+            return
+
+        try:
+            with open_jsonl(path=self.shards[-1], mode="ab") as file:
+                file.write(b"\n".join(self._buffer) + b"\n")
+        except Exception as e:
+            raise e
+        self._buffer = []
+
+    def close(self) -> None:
+        """
+        Writes the remaining buffered entries.
+        """
+        self.flush()
@@ -2,8 +2,22 @@
 import dataclasses
 import json
 import pickle
-from typing import Dict, Iterator, List, Union
-from datasets import Dataset as hf_dataset
+import unicodedata
+from operator import attrgetter, eq, index as as_index
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+if TYPE_CHECKING:
+    from datasets import Dataset as hf_dataset
 
 FIELD = list(["id"])
 DOC_FIELD = list(
@@ -126,7 +140,7 @@ def get_extension(filename: str, filetype: str = None) -> str:
         filename (`str`):
             The name of the file.
         type (`str`, default to `None`):
-            The desired file extension. It can be either "json" or "pickle". If no `type` is provided, the function will return the filename as is.
+            The desired file extension. It can be "json", "jsonl" or "pickle". If no `type` is provided, the function will return the filename as is.
 
     Returns:
         (`str`)
@@ -157,6 +171,12 @@ def get_extension(filename: str, filetype: str = None) -> str:
                 if not filename.strip().endswith(".json")
                 else filename.strip()
             )
+        case "jsonl":
+            return (
+                f"{filename.strip()}.jsonl"
+                if not filename.strip().endswith(".jsonl")
+                else filename.strip()
+            )
         case "pickle":
             return (
                 f"{filename.strip()}.pkl"
@@ -167,11 +187,43 @@ def get_extension(filename: str, filetype: str = None) -> str:
             return filename.strip()
 
 
+def normalize_text(text: str) -> str:
+    """
+    Normalize a text: NFC Unicode form and single spaces between words.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
 class Entry:
     """
     Abstract class, presenting an element of an instance of the class `Dataset`.
+
+    Entries are compact records: their fields are stored in `__slots__`, and the name of each
+    field (`FIELDS`) is mapped to its slot (`SLOTS`) once per class, so that field access by name
+    and the conversions to lists and dictionaries need no per-field dispatch. A subclass declares
+    its own `__slots__`, `FIELDS` and `SLOTS`; slots that are not fields (such as caches) are left
+    out of `SLOTS` and of the pickled state.
     """
 
+    __slots__ = ("_id",)
+    FIELDS: Tuple[str, ...] = tuple(FIELD)
+    SLOTS: Tuple[str, ...] = tuple(["_id"])
+    DEFAULTS: Dict[str, Any] = dict()
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._build_accessors()
+
+    @classmethod
+    def _build_accessors(cls) -> None:
+        cls._GETTERS: Dict[str, Callable[["Entry"], Any]] = {
+            name: attrgetter(slot) for name, slot in zip(cls.FIELDS, cls.SLOTS)
+        }
+        values = attrgetter(*cls.SLOTS)
+        cls._values = staticmethod(
+            values if len(cls.SLOTS) > 1 else (lambda entry: (values(entry),))
+        )
+
     def __init__(
         self,
         index: str = None,
@@ -226,14 +278,8 @@ class Entry:
         {'id':'id_00'}
         ```
         """
-        try:
-            match key:
-                case Field.id:
-                    return self.id
-                case _:
-                    return self.to_dict()
-        except Exception as e:
-            raise e
+        getter = self._GETTERS.get(key)
+        return getter(self) if getter is not None else self.to_dict()
 
     def __getitem__(self, key: str) -> Union[str, None]:
         """
@@ -256,14 +302,21 @@ class Entry:
         'id_00'
         ```
         """
-        try:
-            match key:
-                case Field.id:
-                    return self.id
-                case _:
-                    return None
-        except Exception as e:
-            raise e
+        getter = self._GETTERS.get(key)
+        return getter(self) if getter is not None else None
+
+    def __getstate__(self) -> Tuple[Any, ...]:
+        return self._values(self)
+
+    def __setstate__(self, state: Union[Tuple[Any, ...], Dict[str, Any]]) -> None:
+        # Entries pickled before `__slots__` carry their `__dict__`, keyed by slot names.
+        if isinstance(state, dict):
+            state = tuple(state.get(slot, self.DEFAULTS.get(slot)) for slot in self.SLOTS)
+        for slot, value in zip(self.SLOTS, state):
+            setattr(self, slot, value)
+        for slot, value in self.DEFAULTS.items():
+            if slot not in self.SLOTS:
+                setattr(self, slot, value)
 
     def __str__(self) -> str:
         try:
@@ -279,28 +332,144 @@ class Entry:
 
     def to_list(self) -> List[Union[str, None]]:
         """
-        Converts all the properties of the entry to a list.
-
-        Returns:
-          The method `to_list` is returning a list containing the value of `self.id`.
+        Converts all the properties of the entry to a list, in the order of `FIELDS`.
         """
-        try:
-            return list([self.id])
-        except Exception as e:
-            raise e
+        return list(self._values(self))
 
     def to_dict(self) -> Dict[str, Union[str, None]]:
         """
-        Converts all the properties of the entry to a dictionary.
+        Converts all the properties of the entry to a dictionary keyed by `FIELDS`.
+        """
+        return dict(zip(self.FIELDS, self._values(self)))
 
-        Returns:
-          The method `to_list` is returning a list containing the value of `self.id`.
+
+Entry._build_accessors()
+
+
+def select_rows(key: Any, rows: Sequence[int]) -> Sequence[int]:
+    """
+    Selects positions from `rows` with `key`, which is either a slice, giving a slice of `rows`
+    without copying when `rows` is a `range`, or an array of positions (negative ones counting
+    from the end) or a boolean mask of the same length as `rows`.
+    """
+    if isinstance(key, slice):
+        return rows[key]
+    if getattr(key, "dtype", None) == bool or (
+        len(key) > 0 and all(isinstance(value, bool) for value in key)
+    ):
+        if len(key) != len(rows):
+            raise IndexError(f"boolean mask of length {len(key)} for {len(rows)} entries")
+        return list(row for row, kept in zip(rows, key) if kept)
+    return list(rows[as_index(position)] for position in key)
+
+
+class DatasetView:
+    """
+    A read-only selection of the entries of a dataset by position, returned by slices and index
+    arrays instead of a copied list. The entries are looked up in the dataset on access.
+    """
+
+    def __init__(self, dataset: "Dataset", rows: Sequence[int]) -> None:
         """
+        Args:
+            dataset (`Dataset`):
+                The dataset the entries are selected from.
+            rows (`Sequence[int]`):
+                The positions of the entries in `dataset`, non-negative.
+        """
+        self.dataset = dataset
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(
+        self, key: Union[int, slice, Sequence[int]]
+    ) -> Union[Entry, "DatasetView", None]:
         try:
-            return dict({FIELD[idx]: field for idx, field in enumerate(self.to_list())})
+            match key:
+                case bool():
+                    return None
+                case int():
+                    return self.dataset._at(self.rows[key])
+                case _:
+                    return DatasetView(
+                        dataset=self.dataset, rows=select_rows(key=key, rows=self.rows)
+                    )
         except Exception as e:
             raise e
 
+    def __iter__(self) -> Iterator[Entry]:
+        return map(self.dataset._at, self.rows)
+
+    def __eq__(self, __value: object) -> bool:
+        if isinstance(__value, (DatasetView, list, tuple)):
+            return len(self) == len(__value) and all(map(eq, self, __value))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self)})"
+
+    @property
+    def ids(self) -> List[str]:
+        """Access to the IDs of the selected entries, in order."""
+        return list(entry.id for entry in self)
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """
+        Converts the selected entries to a list of dictionaries.
+        """
+        return list(entry.to_dict() for entry in self)
+
+
+class EntryDict(dict):
+    """
+    The dictionary of the entries of a dataset. Writing to it directly increments `version`, so
+    that the dataset rebuilds what it derives from its entries (the order of their IDs, the keys
+    and indexes of pairs); the dataset itself stores entries without incrementing it.
+    """
+
+    __slots__ = ("version",)
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.version = 0
+
+    def __reduce__(self) -> Tuple[type, Tuple[Dict[str, Entry]]]:
+        return type(self), (dict(self),)
+
+    def __setitem__(self, key: str, value: Entry) -> None:
+        self.version += 1
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        self.version += 1
+        super().__delitem__(key)
+
+    def __ior__(self, other: Dict[str, Entry]) -> "EntryDict":
+        self.version += 1
+        return super().__ior__(other)
+
+    def pop(self, *args) -> Entry:
+        self.version += 1
+        return super().pop(*args)
+
+    def popitem(self) -> Tuple[str, Entry]:
+        self.version += 1
+        return super().popitem()
+
+    def clear(self) -> None:
+        self.version += 1
+        super().clear()
+
+    def update(self, *args, **kwargs) -> None:
+        self.version += 1
+        super().update(*args, **kwargs)
+
+    def setdefault(self, key: str, default: Entry = None) -> Entry:
+        self.version += 1
+        return super().setdefault(key, default)
+
 
 class Dataset:
     """
@@ -308,7 +477,43 @@ class Dataset:
     """
 
     def __init__(self) -> None:
-        self.data: Dict[str, Entry] = {}
+        self.data: Dict[str, Entry] = EntryDict()
+        self._ids: List[str] = []
+
+    def _stale(self, name: str) -> bool:
+        """
+        Whether the structure derived from the entries that `name` tracks must be rebuilt, `data`
+        having been written to directly or assigned since it was last marked up to date, which
+        this does.
+        """
+        data = self.data
+        if not isinstance(data, EntryDict):
+            data = self.data = EntryDict(data)
+        synced = self.__dict__.get(name)
+        self.__dict__[name] = (data, data.version)
+        return synced is None or synced[0] is not data or synced[1] != data.version
+
+    @property
+    def ids(self) -> List[str]:
+        """
+        Access to the IDs of the entries in dataset order, kept up to date by `append` and
+        `extend`, and rebuilt after any other write to `data` or assignment of it.
+        """
+        if self._stale("_ids_synced") or self.__dict__.get("_ids") is None:
+            self._ids = list(self.data)
+        return self._ids
+
+    def _set(self, entry: Entry) -> None:
+        """
+        Store `entry` under its ID. An entry replacing another one keeps its position.
+        """
+        ids = self.ids
+        if entry.id not in self.data:
+            ids.append(entry.id)
+        dict.__setitem__(self.data, entry.id, entry)
+
+    def _at(self, row: int) -> Entry:
+        return self.data[self.ids[row]]
 
     def __call__(self) -> Dict[str, Entry]:
         try:
@@ -323,21 +528,34 @@ class Dataset:
             raise e
 
     def __getitem__(
-        self, key: Union[str, int, slice]
-    ) -> Union[Entry, list[Entry], None]:
+        self, key: Union[str, int, slice, Sequence[int]]
+    ) -> Union[Entry, DatasetView, None]:
+        """
+        An entry by ID or by position, or a `DatasetView` of the entries selected by a slice, an
+        array of positions or a boolean mask.
+        """
         try:
             match key:
                 case str():
                     return self.data.get(key, Entry())
-                case int():
-                    return list(self.data.values())[key]
-                case slice():
-                    return list(self.data.values())[key]
                 case _:
-                    return None
+                    return self._select(key)
         except Exception as e:
             raise e
 
+    def _select(self, key: Union[int, slice, Sequence[int]]) -> Union[Entry, DatasetView, None]:
+        match key:
+            case bool():
+                return None
+            case int():
+                return self._at(range(len(self))[key])
+            case slice():
+                return DatasetView(dataset=self, rows=range(len(self))[key])
+            case _ if hasattr(key, "__len__") and hasattr(key, "__iter__"):
+                return DatasetView(dataset=self, rows=select_rows(key=key, rows=range(len(self))))
+            case _:
+                return None
+
     def __iter__(self) -> Iterator[Entry]:
         try:
             return iter(self.data.values())
@@ -364,7 +582,7 @@ class Dataset:
           entry (Entry): The parameter "entry" is of type "Entry".
         """
         try:
-            self.data[entry.id] = entry
+            self._set(entry)
         except Exception as e:
             raise e
 
@@ -377,7 +595,7 @@ class Dataset:
         """
         try:
             for entry in entries:
-                self.data[entry.id] = entry
+                self._set(entry)
         except Exception as e:
             raise e
 
@@ -395,13 +613,15 @@ class Dataset:
         except Exception as e:
             raise e
 
-    def to_dataset(self) -> hf_dataset:
+    def to_dataset(self) -> "hf_dataset":
         """
         The function converts a custom object to a Hugging Face dataset object.
 
         Returns:
           The code is returning an instance of `hf_dataset` class.
         """
+        from datasets import Dataset as hf_dataset
+
         try:
             return hf_dataset.from_list(self.to_list())
         except Exception as e:
@@ -437,6 +657,36 @@ class Dataset:
         except Exception as e:
             raise e
 
+    def to_jsonl(
+        self, path: str, compression: str = None, ensure_ascii: bool = False
+    ) -> str:
+        """
+        Saves the entries to a JSON Lines file, one entry per line, encoding and writing them in
+        chunks instead of building the whole list first.
+
+        Args:
+            path (`str`):
+                The name of the file, completed with the extension of the format and compression.
+            compression (`str`, default to `None`):
+                `"gzip"`, `"zstd"` (which requires the `zstandard` package) or `None`.
+            ensure_ascii (`bool`, default to `False`):
+                Whether non-ASCII characters are escaped in the output.
+
+        Returns:
+            `str`: the name of the file written.
+        """
+        from .jsonl import write_jsonl
+
+        try:
+            return write_jsonl(
+                entries=(entry.to_dict() for entry in self),
+                path=path,
+                compression=compression,
+                ensure_ascii=ensure_ascii,
+            )
+        except Exception as e:
+            raise e
+
     def to_pickle(self, path: str) -> None:
         """
         The function `to_pickle` saves an object to a pickle file at the specified path.
@@ -1 +1,45 @@
-from .construct import QAConstruct
+import importlib
+from typing import Any, Dict, List
+
+# The construction API needs stanza, torch and underthesea: each name is imported from its
+# subpackage on first access.
+_SUBPACKAGES: Dict[str, str] = dict(
+    {
+        "Checkpoint": ".construct",
+        "ConstructStats": ".stats",
+        "ParseCache": ".construct",
+        "ParserBackend": ".construct",
+        "QAConstruct": ".construct",
+        "RecordingBackend": ".construct",
+        "ReplayBackend": ".construct",
+        "StageStats": ".stats",
+        "StanzaBackend": ".construct",
+        "TokenCache": ".construct",
+        "iter_parallel_articles": ".construct",
+        "iter_parallel_pairs": ".construct",
+        "parallel_construct": ".construct",
+        "AnswerAtStartRule": ".filter",
+        "Filter": ".filter",
+        "LengthRule": ".filter",
+        "PlaceholderRule": ".filter",
+        "QAColumns": ".filter",
+        "Rule": ".filter",
+        "StopwordRatioRule": ".filter",
+        "TypeQuotaRule": ".filter",
+        "Preprocessor": ".preprocess",
+    }
+)
+
+__all__ = list(_SUBPACKAGES)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _SUBPACKAGES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_SUBPACKAGES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
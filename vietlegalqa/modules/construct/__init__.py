@@ -1 +1,36 @@
-from .constructor import QAConstruct
+import importlib
+from typing import Any, Dict, List
+
+# Each name is imported from its module on first access, so that importing one module of the
+# package does not load stanza, torch and underthesea through the others.
+_SUBMODULES: Dict[str, str] = dict(
+    {
+        "ParserBackend": ".backend",
+        "RecordingBackend": ".backend",
+        "ReplayBackend": ".backend",
+        "StanzaBackend": ".backend",
+        "ParseCache": ".cache",
+        "TokenCache": ".cache",
+        "Checkpoint": ".checkpoint",
+        "QAConstruct": ".constructor",
+        "iter_parallel_articles": ".parallel",
+        "iter_parallel_pairs": ".parallel",
+        "parallel_construct": ".parallel",
+        "ConstructStats": "..stats",
+        "StageStats": "..stats",
+    }
+)
+
+__all__ = list(_SUBMODULES)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _SUBMODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_SUBMODULES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
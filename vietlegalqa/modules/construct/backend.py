@@ -0,0 +1,244 @@
+"""IMPORTS"""
+import json
+from typing import TYPE_CHECKING, Any, Dict, List, Protocol, Set, runtime_checkable
+
+from vietlegalqa.data.load import read_jsonl
+from vietlegalqa.data.shard import ShardWriter
+
+from .cache import ParseCache, _normalize
+from .parse import BATCH_UNITS, ParsedSummary, parse_summaries
+
+if TYPE_CHECKING:
+    from stanza.models.common.doc import Word
+    from stanza.pipeline.core import Pipeline
+
+
+@runtime_checkable
+class ParserBackend(Protocol):
+    """
+    What `QAConstruct` needs from the NLP models: the parse of tokenized summaries and the lemmas
+    of tokenized questions. Any object with these two methods can be used in place of the stanza
+    pipelines.
+    """
+
+    def parse(self, summaries: List[List[List[str]]]) -> List[ParsedSummary]:
+        """
+        Parses summaries, each given as a list of sentences of tokens, in order.
+        """
+        ...
+
+    def lemmatize(self, sentences: List[List[str]]) -> List[List[str]]:
+        """
+        Returns the lemmas of each sentence of tokens, in order.
+        """
+        ...
+
+
+def record_key(tokens: List[Any]) -> str:
+    """
+    The key of a tokenized summary or sentence in a replay file.
+    """
+    return json.dumps(_normalize(tokens), ensure_ascii=False)
+
+
+class StanzaBackend:
+    """
+    The backend running live stanza pipelines: a constituency `parser` for the summaries and a
+    lemmatizer `pos` for the questions, both optionally backed by a `ParseCache`.
+
+    A single pipeline with the `lemma` processor as well can serve both: without `pos`, the
+    questions are lemmatized by `parser`, and the lemmas it gives to the summaries are kept in
+    their parse so that `QAConstruct` rarely needs to lemmatize questions at all.
+    """
+
+    def __init__(
+        self,
+        parser: "Pipeline" = None,
+        pos: "Pipeline" = None,
+        batch_size: int = 1,
+        batch_unit: str = "sentence",
+        cache: ParseCache = None,
+    ) -> None:
+        """
+        Args:
+            parser (`Pipeline`, default to `None`):
+                A pretokenized stanza pipeline with the `constituency` (and `ner`, optionally
+                `lemma`) processors.
+            pos (`Pipeline`, default to `None`):
+                A pretokenized stanza pipeline with the `lemma` processor, `parser` being used if
+                none is given.
+            batch_size (`int`, default to `1`) and batch_unit (`str`, default to `"sentence"`):
+                The size of the parser batches, see `parse_summaries`.
+            cache (`ParseCache`, default to `None`):
+                An on-disk cache of previous parses and lemmas.
+        """
+        if batch_unit not in BATCH_UNITS:
+            raise ValueError(f"batch_unit must be one of {BATCH_UNITS}, got {batch_unit}")
+
+        self.parser = parser
+        self.pos = pos
+        self.batch_size = batch_size
+        self.batch_unit = batch_unit
+        self.cache = cache
+
+    @property
+    def lemmatizer(self) -> "Pipeline":
+        """The pipeline lemmatizing the questions."""
+        return self.pos if self.pos is not None else self.parser
+
+    def parse(self, summaries: List[List[List[str]]]) -> List[ParsedSummary]:
+        return parse_summaries(
+            summaries=summaries,
+            parser=self.parser,
+            batch_size=self.batch_size,
+            batch_unit=self.batch_unit,
+            cache=self.cache,
+        )
+
+    def lemmatize(self, sentences: List[List[str]]) -> List[List[str]]:
+        lemmas: List[List[str]] = [[] for _ in sentences]
+        keys: List[str] = [None] * len(sentences)
+        pending: List[int] = []
+
+        for idx, sent in enumerate(sentences):
+            if len(sent) == 0:
+                continue
+            if self.cache is not None:
+                keys[idx] = self.cache.key(text=sent, pipeline=self.lemmatizer)
+                value = self.cache.get(key=keys[idx])
+                if value is not None:
+                    lemmas[idx] = value
+                    continue
+            pending.append(idx)
+
+        if len(pending) > 0:
+            try:
+                words: List[List["Word"]] = [
+                    sent.words
+                    for sent in self.lemmatizer([sentences[idx] for idx in pending]).sentences
+                ]
+            except Exception as e:
+                raise e
+
+            for idx, sent_words in zip(pending, words):
+                lemmas[idx] = [word.lemma for word in sent_words]
+                if self.cache is not None:
+                    self.cache.put(key=keys[idx], value=lemmas[idx])
+
+        if self.cache is not None:
+            self.cache.flush()
+
+        return lemmas
+
+
+class ReplayBackend:
+    """
+    A backend serving parses and lemmas saved by an earlier run (see `RecordingBackend`), without
+    loading any model. The records are read from a JSON Lines file, or a directory of shards, with
+    one of the following forms:
+
+        {"tokens": [["Người lao động", ...], ...], "parse": <ParsedSummary.to_dict()>}
+        {"tokens": ["Người lao động", ...], "lemmas": ["người lao động", ...]}
+
+    The constituency trees of a parse may also be given as bracketed strings, with the spaces of a
+    word written as underscores (`"(ROOT (S (NP (N Người_lao_động)) ...))"`).
+    """
+
+    def __init__(self, path: str, strict: bool = True) -> None:
+        """
+        Args:
+            path (`str`):
+                The JSON Lines file or directory of the records.
+            strict (`bool`, default to `True`):
+                Whether a summary or sentence without a record raises a `KeyError`. Otherwise it
+                gets an empty parse or no lemmas.
+        """
+        self.path = path
+        self.strict = strict
+        self.parses: Dict[str, Dict[str, Any]] = {}
+        self.lemmas: Dict[str, List[str]] = {}
+
+        for record in read_jsonl(path=path):
+            if "parse" in record:
+                self.parses[record_key(tokens=record["tokens"])] = record["parse"]
+            if "lemmas" in record:
+                self.lemmas[record_key(tokens=record["tokens"])] = record["lemmas"]
+
+    def parse(self, summaries: List[List[List[str]]]) -> List[ParsedSummary]:
+        parsed: List[ParsedSummary] = []
+        for summary in summaries:
+            value = self.parses.get(record_key(tokens=summary))
+            if value is None:
+                if self.strict and len(summary) > 0:
+                    raise KeyError(f"No parse recorded in {self.path} for {summary}")
+                parsed.append(ParsedSummary(sentences=[]))
+                continue
+            parsed.append(ParsedSummary.from_dict(value=value))
+        return parsed
+
+    def lemmatize(self, sentences: List[List[str]]) -> List[List[str]]:
+        lemmas: List[List[str]] = []
+        for sent in sentences:
+            value = self.lemmas.get(record_key(tokens=sent))
+            if value is None:
+                if self.strict and len(sent) > 0:
+                    raise KeyError(f"No lemmas recorded in {self.path} for {sent}")
+                value = []
+            lemmas.append(list(value))
+        return lemmas
+
+
+class RecordingBackend:
+    """
+    A backend forwarding to another one and saving every new parse and lemmatization to rotating
+    JSON Lines shards, in the format read by `ReplayBackend`.
+    """
+
+    def __init__(
+        self, backend: ParserBackend, directory: str, prefix: str = "parse"
+    ) -> None:
+        """
+        Args:
+            backend (`ParserBackend`):
+                The backend actually producing the parses and lemmas.
+            directory (`str`):
+                The directory the records are written to.
+            prefix (`str`, default to `"parse"`):
+                The prefix of the shard file names.
+        """
+        self.backend = backend
+        self.writer = ShardWriter(directory=directory, prefix=prefix)
+        self._seen: Set[str] = set()
+
+    def __enter__(self) -> "RecordingBackend":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _record(self, tokens: List[Any], field: str, value: Any) -> None:
+        key = f"{field}:{record_key(tokens=tokens)}"
+        if key in self._seen:
+            return
+        self._seen.add(key)
+        self.writer.write({"tokens": tokens, field: value})
+
+    def parse(self, summaries: List[List[List[str]]]) -> List[ParsedSummary]:
+        parsed = self.backend.parse(summaries)
+        for summary, summary_nlp in zip(summaries, parsed):
+            if len(summary) > 0:
+                self._record(tokens=summary, field="parse", value=summary_nlp.to_dict())
+        return parsed
+
+    def lemmatize(self, sentences: List[List[str]]) -> List[List[str]]:
+        lemmas = self.backend.lemmatize(sentences)
+        for sent, sent_lemmas in zip(sentences, lemmas):
+            if len(sent) > 0:
+                self._record(tokens=sent, field="lemmas", value=sent_lemmas)
+        return lemmas
+
+    def close(self) -> None:
+        """
+        Writes the remaining buffered records.
+        """
+        self.writer.close()
@@ -0,0 +1,247 @@
+"""IMPORTS"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+
+from vietlegalqa.data.utils import normalize_text
+
+if TYPE_CHECKING:
+    from stanza.pipeline.core import Pipeline
+
+# The access counter is read from the file in the statement that writes it, so that processes
+# sharing a cache (e.g. the workers of a parallel run) order their accesses together.
+_NEXT_ACCESS = "(SELECT COALESCE(MAX(accessed), 0) + 1 FROM entries)"
+# Eviction removes entries until the stored values fit in this fraction of `max_size`, so that it
+# runs once per that many bytes written rather than on every write past the limit.
+LOW_WATER = 0.9
+
+
+def _normalize(value: Union[str, List[Any]]) -> Union[str, List[Any]]:
+    if isinstance(value, str):
+        return normalize_text(value)
+    return list(_normalize(item) for item in value)
+
+
+class ParseCache:
+    """
+    A content-addressed on-disk cache of stanza outputs, stored in a SQLite file.
+
+    Entries are keyed on the normalized input text together with the stanza version, the language
+    and the processors of the pipeline that produced them, so changing the downstream heuristics
+    keeps every entry valid while changing the models does not. Once the stored values exceed
+    `max_size` bytes, the least recently used entries are evicted. The cache can be shared by the
+    threads of a staged pipeline and by processes: the order of the accesses is kept in the file.
+    Every write is committed at once, the hits being recorded in memory and stamped by `flush`, so
+    that no transaction is left open, holding the write lock of the file, while a parser runs.
+    """
+
+    def __init__(self, path: str, max_size: int = 2**30) -> None:
+        """
+        Opens (or creates) the cache stored at `path`.
+
+        Args:
+            path (`str`):
+                The SQLite file of the cache.
+            max_size (`int`, default to `2**30`):
+                The maximum total size, in bytes, of the stored values.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+        self._accessed: Dict[str, None] = {}
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+            "size INTEGER NOT NULL, accessed INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)"
+        )
+        self._conn.commit()
+
+        self._size = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    @property
+    def size(self) -> int:
+        """Access to the total size, in bytes, of the stored values."""
+        return self._size
+
+    def key(
+        self, text: Union[str, List[Any]], pipeline: "Pipeline", version: int = None
+    ) -> str:
+        """
+        Compute the key of `text` (a string or nested lists of tokens) processed by `pipeline`,
+        `version` being the format of the stored value.
+        """
+        import stanza
+
+        return hashlib.sha256(
+            json.dumps(
+                [
+                    _normalize(text),
+                    stanza.__version__,
+                    getattr(pipeline, "lang", None),
+                    sorted(getattr(pipeline, "processors", None) or []),
+                    version,
+                ],
+                ensure_ascii=False,
+            ).encode("utf-8")
+        ).hexdigest()
+
+    def get(self, key: str) -> Any:
+        """
+        Returns the value stored under `key`, or `None` if there is none.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._accessed.pop(key, None)
+            self._accessed[key] = None
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        Stores the JSON-serializable `value` under `key`, evicting old entries if needed, and
+        commits.
+        """
+        blob = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode(
+            "utf-8"
+        )
+        with self._lock:
+            self._accessed.pop(key, None)
+            with self._conn:
+                self._stamp()
+                previous = self._conn.execute(
+                    "SELECT size FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, accessed) "
+                    f"VALUES (?, ?, ?, {_NEXT_ACCESS})",
+                    (key, blob, len(blob)),
+                )
+                self._size += len(blob) - (previous[0] if previous is not None else 0)
+
+                if self._size > self.max_size:
+                    self._evict()
+
+    def _stamp(self) -> None:
+        # Marks the entries hit since the last write as the most recently used, in hit order.
+        self._conn.executemany(
+            f"UPDATE entries SET accessed = {_NEXT_ACCESS} WHERE key = ?",
+            list((key,) for key in self._accessed),
+        )
+        self._accessed = {}
+
+    def _evict(self) -> None:
+        self._size = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+        if self._size <= self.max_size:
+            return
+
+        evicted: List[Tuple[str]] = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY accessed ASC"
+        ):
+            if self._size <= self.max_size * LOW_WATER:
+                break
+            evicted.append((key,))
+            self._size -= size
+
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+
+    def evict(self) -> None:
+        """
+        If the cache exceeds `max_size` bytes, removes the least recently used entries until it
+        fits in `LOW_WATER` of it, and commits.
+        """
+        with self._lock:
+            with self._conn:
+                self._stamp()
+                self._evict()
+
+    def flush(self) -> None:
+        """
+        Records the hits since the last write, in one short transaction.
+        """
+        with self._lock:
+            if len(self._accessed) > 0:
+                with self._conn:
+                    self._stamp()
+
+    def close(self) -> None:
+        """
+        Records the pending hits and closes the cache.
+        """
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+
+class TokenCache:
+    """
+    An in-memory cache of word-segmented sentences, keyed on the sentence text. Legal summaries
+    repeat many boilerplate sentences, which are then segmented only once. Once it holds `max_size`
+    sentences, the least recently used ones are evicted.
+    """
+
+    def __init__(self, max_size: int = 100000) -> None:
+        """
+        Args:
+            max_size (`int`, default to `100000`):
+                The maximum number of sentences kept.
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, List[str]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, sentence: str) -> Optional[List[str]]:
+        """
+        Returns the words of `sentence`, or `None` if it is not cached.
+        """
+        tokens = self._entries.get(sentence)
+        if tokens is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(sentence)
+        return list(tokens)
+
+    def put(self, sentence: str, tokens: List[str]) -> None:
+        """
+        Stores the words of `sentence`, evicting the least recently used sentence if needed.
+        """
+        self._entries[sentence] = list(tokens)
+        self._entries.move_to_end(sentence)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
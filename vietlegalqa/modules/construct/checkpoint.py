@@ -0,0 +1,135 @@
+"""IMPORTS"""
+import json
+import os
+from typing import Any, Dict, Iterator, List, Tuple
+
+from vietlegalqa.data.doc import Article, Document
+from vietlegalqa.data.qa import QAPair
+from vietlegalqa.data.shard import ShardWriter
+
+
+class Checkpoint:
+    """
+    The progress of a construction job streaming its pairs to a `ShardWriter`: the articles already
+    processed, the number of pairs generated so far and the state of the writer, saved together to
+    a JSON file. The IDs of the processed articles are appended to `<path>.articles`, one per line,
+    and the JSON file only records how many of them belong to the checkpoint, so that a save does
+    not rewrite every ID.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        articles: List[str] = None,
+        count: int = 0,
+        writer: Dict[str, Any] = None,
+    ) -> None:
+        """
+        Args:
+            path (`str`):
+                The JSON file of the checkpoint.
+            articles (`List[str]`, default to `None`):
+                The IDs of the processed articles, in order.
+            count (`int`, default to `0`):
+                The number of pairs generated so far, which is the number of the next pair.
+            writer (`Dict[str, Any]`, default to `None`):
+                The `ShardWriter.state()` matching the processed articles.
+        """
+        self.path = path
+        self.articles: List[str] = list(articles) if articles is not None else []
+        self.count = count
+        self.writer = writer
+        self._saved = 0
+
+    @property
+    def articles_path(self) -> str:
+        """The file the IDs of the processed articles are appended to."""
+        return f"{self.path}.articles"
+
+    @classmethod
+    def load(cls, path: str) -> "Checkpoint":
+        """
+        Loads the checkpoint saved at `path`, or returns an empty one if there is none.
+        """
+        if not os.path.exists(path):
+            return cls(path=path)
+
+        try:
+            with open(file=path, mode="r", encoding="utf-8") as file:
+                state = json.load(fp=file)
+            if isinstance(state["articles"], list):
+                return cls(path=path, **state)
+
+            checkpoint = cls(path=path, **dict(state, articles=None))
+            # IDs appended after the last save of the JSON file are dropped, on disk as well,
+            # so that the next save appends right after the saved ones.
+            size = 0
+            with open(file=checkpoint.articles_path, mode="r+b") as file:
+                for line in file:
+                    if len(checkpoint.articles) == state["articles"]:
+                        break
+                    checkpoint.articles.append(line.decode("utf-8").rstrip("\n"))
+                    size += len(line)
+                file.truncate(size)
+            checkpoint._saved = len(checkpoint.articles)
+            return checkpoint
+        except Exception as e:
+            raise e
+
+    def save(self, writer: ShardWriter) -> None:
+        """
+        Flushes `writer`, appends the articles processed since the last save and atomically saves
+        the checkpoint.
+        """
+        self.writer = writer.state()
+        try:
+            with open(
+                file=self.articles_path,
+                mode="a" if self._saved > 0 else "w",
+                encoding="utf-8",
+            ) as file:
+                file.writelines(f"{article}\n" for article in self.articles[self._saved :])
+            self._saved = len(self.articles)
+
+            with open(file=f"{self.path}.tmp", mode="w", encoding="utf-8") as file:
+                json.dump(
+                    obj={
+                        "articles": self._saved,
+                        "count": self.count,
+                        "writer": self.writer,
+                    },
+                    fp=file,
+                )
+            os.replace(f"{self.path}.tmp", self.path)
+        except Exception as e:
+            raise e
+
+    def remaining(self, document: Document) -> Document:
+        """
+        Returns the articles of `document` that have not been processed yet.
+        """
+        done = set(self.articles)
+        remaining = Document()
+        remaining.extend(article for article in document if article.id not in done)
+        return remaining
+
+    def consume(
+        self,
+        stream: Iterator[Tuple[Article, List[QAPair]]],
+        writer: ShardWriter,
+        every: int = 100,
+    ) -> None:
+        """
+        Writes the pairs of `stream` (as yielded by `QAConstruct.iter_articles`) to `writer`,
+        saving the checkpoint every `every` articles and at the end.
+        """
+        for article, pairs in stream:
+            for pair in pairs:
+                writer.write(pair)
+            self.articles.append(article.id)
+            self.count += len(pairs)
+
+            if len(self.articles) % every == 0:
+                self.save(writer=writer)
+
+        self.save(writer=writer)
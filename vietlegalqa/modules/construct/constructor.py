@@ -1,145 +1,410 @@
 """IMPORTS"""
-from typing import List
+from typing import TYPE_CHECKING, Iterator, List, Set, Tuple
 from tqdm import tqdm
-from stanza.pipeline.core import Pipeline
 
-from vietlegalqa.data.doc import Document
+from vietlegalqa.data.doc import Article, Document
 from vietlegalqa.data.qa import QADataset, QAPair
 
+from .backend import ParserBackend, StanzaBackend
+from .cache import ParseCache, TokenCache
+from .locate import LOCATE_METHODS, AnswerLocator, ahocorasick
+from .parse import ParsedSummary, batch_size_of
+from .stages import iter_prefetch
+from ..stats import ConstructStats
 from .utils import (
     POS_REPLACE,
     POS_TAGS,
-    extract_clauses,
-    get_answer_start,
-    get_keys,
-    get_summary_nlp,
-    tree_to_text,
+    Candidate,
+    SentenceSpans,
+    Span,
+    extract_spans,
+    get_question_lemmas,
+    select_contexts,
+    stanza_tokenizer,
 )
 
+if TYPE_CHECKING:
+    from stanza.pipeline.core import Pipeline
+
 
 class QAConstruct:
-    def __init__(self, stopwords: List[str], parser: Pipeline, pos: Pipeline) -> None:
+    def __init__(
+        self,
+        stopwords: List[str],
+        parser: "Pipeline" = None,
+        pos: "Pipeline" = None,
+        batch_size: int = 1,
+        batch_unit: str = "sentence",
+        progress: bool = True,
+        cache: ParseCache = None,
+        rank_method: str = "substring",
+        locate_method: str = "auto",
+        prefetch: int = 0,
+        token_cache_size: int = 100000,
+        stats: bool = False,
+        backend: ParserBackend = None,
+        dedupe: bool = False,
+    ) -> None:
         self.data = QADataset()
         self.stopwords = stopwords
         self.parser = parser
         self.pos = pos
+        self.batch_size = batch_size
+        self.batch_unit = batch_unit
+        self.progress = progress
+        self.cache = cache
+        self.backend: ParserBackend = (
+            backend
+            if backend is not None
+            else StanzaBackend(
+                parser=parser,
+                pos=pos,
+                batch_size=batch_size,
+                batch_unit=batch_unit,
+                cache=cache,
+            )
+        )
+        self.rank_method = rank_method
+        self.prefetch = prefetch
+        self.dedupe = dedupe
+        self.stats = ConstructStats(enabled=stats)
+        self.token_cache = (
+            TokenCache(max_size=token_cache_size) if token_cache_size > 0 else None
+        )
+        match locate_method:
+            case "auto":
+                self.use_automaton = ahocorasick is not None
+            case "automaton":
+                self.use_automaton = True
+            case "find":
+                self.use_automaton = False
+            case _:
+                raise ValueError(
+                    f"locate_method must be one of {LOCATE_METHODS}, got {locate_method}"
+                )
 
     def __call__(self, document: Document, id_prefix: str = "qa") -> QADataset:
-        for article in tqdm(document, desc="QA Dataset Generation"):
-            for summary in article.summary:
-                summary, summary_nlp = get_summary_nlp(
-                    summary=summary, parser=self.parser
-                )
+        for pair in self.iter_pairs(
+            document=document, id_prefix=id_prefix, start=len(self.data)
+        ):
+            if self.dedupe:
+                self.data.add(pair)
+            else:
+                self.data.append(pair)
 
-                try:
-                    keys = {
-                        pos_tag: get_keys(doc_nlp=summary_nlp, pos_tag=pos_tag)
-                        for pos_tag in POS_TAGS
-                    }
-                    keys["NE"] = summary_nlp.ents
-                except Exception as e:
-                    raise e
-                if sum(len(key) for key in keys) == 0:
-                    continue
+        return self.data
+
+    def iter_pairs(
+        self, document: Document, id_prefix: str = "qa", start: int = 0
+    ) -> Iterator[QAPair]:
+        """
+        Generate the QA pairs of `document` one at a time, without keeping them in `self.data`.
 
-                try:
-                    clauses = extract_clauses(
-                        summary_nlp, s_threshold=3, comma_threshold=5
+        Args:
+            document (`Document`):
+                The articles to generate QA pairs from.
+            id_prefix (`str`, default to `"qa"`):
+                The prefix of the generated pair IDs.
+            start (`int`, default to `0`):
+                The number of the first generated pair.
+
+        Yields:
+            `QAPair`
+        """
+        for _, pairs in self.iter_articles(
+            document=document, id_prefix=id_prefix, start=start
+        ):
+            yield from pairs
+
+    def iter_articles(
+        self, document: Document, id_prefix: str = "qa", start: int = 0
+    ) -> Iterator[Tuple[Article, List[QAPair]]]:
+        """
+        Generate the QA pairs of `document` article by article, in document order. Every article
+        is yielded, even those without any pair.
+
+        Yields:
+            `Tuple[Article, List[QAPair]]`
+        """
+        index = start
+        for batch in self.iter_parsed(document=document):
+            with self.stats.stage(
+                name="extract",
+                items=sum(len(summaries) for _, summaries in batch),
+            ):
+                candidates: List[Tuple[Article, List[Candidate]]] = [
+                    (
+                        article,
+                        [
+                            candidate
+                            for summary_nlp in summaries
+                            for candidate in self.get_candidates(summary_nlp=summary_nlp)
+                        ],
                     )
-                except Exception as e:
-                    raise e
-                if len(clauses) == 0:
-                    continue
+                    for article, summaries in batch
+                ]
+                if self.dedupe:
+                    candidates = [
+                        (article, self.unique_candidates(candidates=article_candidates))
+                        for article, article_candidates in candidates
+                    ]
 
-                for tag, answers in keys.items():
-                    if tag == "NE":
-                        for answer in summary_nlp.ents:
-                            if len(answer.text) == 0:
-                                continue
-
-                            questions = [
-                                clause.replace(answer.text, answer.type, 1)
-                                for clause in clauses
-                                if clause.find(answer.text) != -1
-                            ]
-
-                            if len(questions) == 0:
-                                questions = [
-                                    tree_to_text(sent.constituency).replace(
-                                        answer.text,
-                                        answer.type,
-                                        1,
-                                    )
-                                    for sent in summary_nlp.sentences
-                                    if answer.end_char <= sent.tokens[-1].end_char
-                                ]
-
-                            if len(questions) == 0:
-                                continue
-                            question = questions[0]
-
-                            try:
-                                context_id, start = get_answer_start(
-                                    answer=answer.text,
-                                    question=question,
-                                    article=article,
-                                    pos=self.pos,
-                                    stopwords=self.stopwords,
-                                )
-                            except Exception as e:
-                                raise e
-                            if start == -1:
-                                continue
-
-                            self.data.append(
-                                QAPair(
-                                    index=f"{id_prefix}_{len(self.data)}",
-                                    article=f"{article.id}__{context_id}",
-                                    question=question,
-                                    answer=answer.text,
-                                    start=start,
-                                    ans_type=answer.type,
-                                    is_impossible=False,
-                                )
+            questions = [
+                candidate
+                for _, article_candidates in candidates
+                for candidate in article_candidates
+            ]
+            with self.stats.stage(name="lemmatize", items=len(questions)):
+                lemmas = get_question_lemmas(
+                    questions=[candidate.question for candidate in questions],
+                    pos=self.backend,
+                    stopwords=self.stopwords,
+                    tokens=[candidate.tokens for candidate in questions],
+                    lemmas=[candidate.lemmas for candidate in questions],
+                )
+
+            cursor = 0
+            for article, article_candidates in candidates:
+                pairs: List[QAPair] = []
+                with self.stats.stage(name="rank", items=len(article_candidates)):
+                    table = (
+                        AnswerLocator(
+                            answers=[candidate.answer for candidate in article_candidates]
+                        ).locate(contexts=article.context)
+                        if self.use_automaton and len(article_candidates) > 0
+                        else None
+                    )
+
+                    try:
+                        context_ids = select_contexts(
+                            queries=lemmas[cursor : cursor + len(article_candidates)],
+                            article=article,
+                            method=self.rank_method,
+                        )
+                    except Exception as e:
+                        raise e
+                    cursor += len(article_candidates)
+
+                    for candidate, context_id in zip(article_candidates, context_ids):
+
+                        self.stats.count(counter="candidates", key=candidate.type)
+                        answer_start = (
+                            table.get((candidate.answer, context_id), -1)
+                            if table is not None
+                            else article.context[context_id].find(candidate.answer)
+                        )
+                        if answer_start == -1:
+                            self.stats.count(
+                                counter="dropped.not_found", key=candidate.type
                             )
-                    else:
-                        for answer in answers:
-                            if len(answer) == 0:
-                                continue
-
-                            questions = [
-                                clause.replace(answer, POS_REPLACE[tag], 1)
-                                for clause in clauses
-                                if len(answer) != 0 and clause.find(answer) != -1
-                            ]
-
-                            if len(questions) == 0:
-                                continue
-                            question = questions[0]
-
-                            try:
-                                context_id, start = get_answer_start(
-                                    answer=answer,
-                                    question=question,
-                                    article=article,
-                                    pos=self.pos,
-                                    stopwords=self.stopwords,
-                                )
-                            except Exception as e:
-                                raise e
-                            if start == -1:
-                                continue
-
-                            self.data.append(
-                                QAPair(
-                                    index=f"tvpl_{len(self.data)}",
-                                    article=f"{article.id}__{context_id}",
-                                    question=question,
-                                    answer=answer,
-                                    start=start,
-                                    ans_type=POS_REPLACE[tag],
-                                    is_impossible=False,
+                            continue
+
+                        self.stats.count(counter="pairs", key=candidate.type)
+                        pairs.append(
+                            QAPair(
+                                index=f"{id_prefix}_{index}",
+                                article=f"{article.id}__{context_id}",
+                                question=candidate.question,
+                                answer=candidate.answer,
+                                start=answer_start,
+                                ans_type=candidate.type,
+                                is_impossible=False,
+                            )
+                        )
+                        index += 1
+
+                self.stats.count(counter="articles", key="processed")
+                if len(pairs) == 0:
+                    self.stats.count(counter="articles", key="without_pairs")
+                yield article, pairs
+
+    def iter_parsed(
+        self, document: Document
+    ) -> Iterator[List[Tuple[Article, List[ParsedSummary]]]]:
+        """
+        Gather the tokenized summaries of consecutive articles until they fill `batch_size`
+        sentences (or tokens), parse them together and hand each batch back as a list of articles
+        with the parses of their own summaries, in document order.
+
+        With `prefetch > 0`, tokenization and parsing run as two background stages, each keeping
+        at most `prefetch` batches ahead of the next stage, so the parser works on a batch while
+        the following one is tokenized and the previous one is post-processed by the caller.
+        """
+        if self.prefetch <= 0:
+            for buffer in self.iter_tokenized(document=document):
+                yield self._parse_buffer(buffer=buffer)
+            return
+
+        # `map` has no `close`: the tokenization stage is closed here once the parsing stage,
+        # which consumes it in its own thread, has stopped.
+        tokenized = iter_prefetch(
+            iterable=self.iter_tokenized(document=document), size=self.prefetch
+        )
+        try:
+            yield from iter_prefetch(
+                iterable=map(self._parse_buffer, tokenized), size=self.prefetch
+            )
+        finally:
+            tokenized.close()
+
+    def iter_tokenized(
+        self, document: Document
+    ) -> Iterator[List[Tuple[Article, List[List[List[str]]]]]]:
+        """
+        Tokenize the summaries of `document` and group consecutive articles into batches of at
+        least `batch_size` sentences (or tokens), the last one excepted.
+        """
+        buffer: List[Tuple[Article, List[List[List[str]]]]] = []
+        size = 0
+
+        for article in tqdm(
+            document, desc="QA Dataset Generation", disable=not self.progress
+        ):
+            with self.stats.stage(name="tokenize", items=len(article.summary)):
+                summaries = [
+                    stanza_tokenizer(text=summary, cache=self.token_cache)
+                    for summary in article.summary
+                ]
+            buffer.append((article, summaries))
+            size += sum(
+                batch_size_of(summary=summary, batch_unit=self.batch_unit)
+                for summary in summaries
+            )
+            if size >= self.batch_size:
+                yield buffer
+                buffer, size = [], 0
+
+        if len(buffer) > 0:
+            yield buffer
+
+    def _parse_buffer(
+        self, buffer: List[Tuple[Article, List[List[List[str]]]]]
+    ) -> List[Tuple[Article, List[ParsedSummary]]]:
+        with self.stats.stage(
+            name="parse", items=sum(len(summaries) for _, summaries in buffer)
+        ):
+            parsed = self.backend.parse(
+                [summary for _, summaries in buffer for summary in summaries]
+            )
+
+        batch: List[Tuple[Article, List[ParsedSummary]]] = []
+        cursor = 0
+        for article, summaries in buffer:
+            batch.append((article, parsed[cursor : cursor + len(summaries)]))
+            cursor += len(summaries)
+
+        return batch
+
+    def unique_candidates(self, candidates: List[Candidate]) -> List[Candidate]:
+        """
+        Keep the first candidate of each `(question, answer)` of an article. Duplicates would give
+        the same context and answer start, hence the same `QAPair`, so they are dropped before
+        being lemmatized and ranked.
+        """
+        seen: Set[Tuple[str, str]] = set()
+        unique: List[Candidate] = []
+        for candidate in candidates:
+            key = (candidate.question, candidate.answer)
+            if key in seen:
+                self.stats.count(counter="dropped.duplicate", key=candidate.type)
+                continue
+            seen.add(key)
+            unique.append(candidate)
+        return unique
+
+    def get_candidates(self, summary_nlp: ParsedSummary) -> List[Candidate]:
+        """
+        Extract the answers of a single parsed summary and build a cloze question for each of them.
+        """
+        try:
+            sentences: List[SentenceSpans] = [
+                extract_spans(
+                    tree=sent.constituency,
+                    pos_tags=POS_TAGS,
+                    s_threshold=3,
+                    comma_threshold=5,
+                )
+                for sent in summary_nlp.sentences
+            ]
+        except Exception as e:
+            raise e
+
+        if sum(len(sent.clauses) for sent in sentences) == 0:
+            self.stats.count(counter="dropped.no_clause", key="summary")
+            return []
+
+        lemmas: List[List[str]] = [
+            (
+                sent_nlp.lemmas
+                if sent_nlp.lemmas is not None and len(sent_nlp.lemmas) == len(sent.leaves)
+                else None
+            )
+            for sent, sent_nlp in zip(sentences, summary_nlp.sentences)
+        ]
+
+        candidates: List[Candidate] = []
+        for tag in POS_TAGS:
+            for sent, sent_lemmas in zip(sentences, lemmas):
+                for span in sent.spans[tag]:
+                    if len(span) == 0:
+                        self.stats.count(counter="dropped.empty", key=POS_REPLACE[tag])
+                        continue
+
+                    clause = sent.containing(span=span)
+                    if clause is None:
+                        self.stats.count(counter="dropped.no_clause", key=POS_REPLACE[tag])
+                        continue
+
+                    tokens = sent.cloze_tokens(
+                        clause=clause, span=span, placeholder=POS_REPLACE[tag]
+                    )
+                    candidates.append(
+                        Candidate(
+                            answer=sent.text(span=span),
+                            question=" ".join(tokens),
+                            type=POS_REPLACE[tag],
+                            tokens=tokens,
+                            lemmas=(
+                                sent.cloze_tokens(
+                                    clause=clause,
+                                    span=span,
+                                    placeholder=POS_REPLACE[tag],
+                                    words=sent_lemmas,
                                 )
+                                if sent_lemmas is not None
+                                else None
+                            ),
+                        )
+                    )
+
+        for sent, sent_nlp, sent_lemmas in zip(sentences, summary_nlp.sentences, lemmas):
+            for ent in sent_nlp.ents:
+                if len(ent.text) == 0:
+                    continue
+
+                span = Span(label="NE", start=ent.start_token, end=ent.end_token)
+                clause = sent.containing(span=span)
+                if clause is None:
+                    clause = Span(label="ROOT", start=0, end=len(sent.leaves))
+
+                tokens = sent.cloze_tokens(clause=clause, span=span, placeholder=ent.type)
+                candidates.append(
+                    Candidate(
+                        answer=ent.text,
+                        question=" ".join(tokens),
+                        type=ent.type,
+                        tokens=tokens,
+                        lemmas=(
+                            sent.cloze_tokens(
+                                clause=clause,
+                                span=span,
+                                placeholder=ent.type,
+                                words=sent_lemmas,
                             )
+                            if sent_lemmas is not None
+                            else None
+                        ),
+                    )
+                )
 
-        return self.data
+        return candidates
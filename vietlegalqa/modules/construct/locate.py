@@ -0,0 +1,107 @@
+"""IMPORTS"""
+from typing import Dict, Iterator, List, Tuple
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+LOCATE_METHODS: List[str] = list(["auto", "automaton", "find"])
+
+
+class AnswerLocator:
+    """
+    An Aho-Corasick automaton over a set of answers, finding all of them in a context with a single
+    scan. The C implementation of the `pyahocorasick` package is used when it is installed,
+    otherwise a pure Python automaton is built.
+    """
+
+    def __init__(self, answers: List[str]) -> None:
+        """
+        Compiles the automaton of `answers`. Empty and duplicate answers are ignored.
+
+        Args:
+            answers (`List[str]`):
+                The answers to look for.
+        """
+        self.answers: List[str] = list(dict.fromkeys(answer for answer in answers if answer))
+
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for pattern_id, answer in enumerate(self.answers):
+                self._automaton.add_word(answer, pattern_id)
+            if len(self.answers) > 0:
+                self._automaton.make_automaton()
+            return
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+
+        for pattern_id, answer in enumerate(self.answers):
+            state = 0
+            for char in answer:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._out[state].append(pattern_id)
+
+        queue: List[int] = list(self._goto[0].values())
+        for state in queue:
+            for char, child in self._goto[state].items():
+                fail = self._fail[state]
+                while fail != 0 and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+                queue.append(child)
+
+    def __len__(self) -> int:
+        return len(self.answers)
+
+    def _scan(self, context: str) -> Iterator[Tuple[int, int]]:
+        if len(self.answers) == 0:
+            return
+
+        if ahocorasick is not None:
+            for end, pattern_id in self._automaton.iter(context):
+                yield pattern_id, end - len(self.answers[pattern_id]) + 1
+            return
+
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for end, char in enumerate(context):
+            while state != 0 and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_id in out[state]:
+                yield pattern_id, end - len(self.answers[pattern_id]) + 1
+
+    def iter_hits(self, contexts: List[str]) -> Iterator[Tuple[str, int, int]]:
+        """
+        Scans every context once.
+
+        Yields:
+            `Tuple[str, int, int]`: every occurrence, as `(answer, context_id, start)`.
+        """
+        for context_id, context in enumerate(contexts):
+            for pattern_id, start in self._scan(context):
+                yield self.answers[pattern_id], context_id, start
+
+    def locate(self, contexts: List[str]) -> Dict[Tuple[str, int], int]:
+        """
+        Scans every context once and keeps the first occurrence of each answer in each context,
+        which is what `str.find` would return.
+
+        Returns:
+            `Dict[Tuple[str, int], int]`: the start of each answer found, keyed on
+            `(answer, context_id)`.
+        """
+        table: Dict[Tuple[str, int], int] = {}
+        for answer, context_id, start in self.iter_hits(contexts=contexts):
+            if (answer, context_id) not in table or start < table[(answer, context_id)]:
+                table[(answer, context_id)] = start
+        return table
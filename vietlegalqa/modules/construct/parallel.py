@@ -0,0 +1,198 @@
+"""IMPORTS"""
+import multiprocessing
+from typing import Any, Dict, Iterator, List, Tuple
+from tqdm import tqdm
+
+from vietlegalqa.data.doc import Article, Document
+from vietlegalqa.data.qa import QADataset, QAPair
+
+from .cache import ParseCache
+from .constructor import QAConstruct
+from ..stats import ConstructStats
+
+_CONSTRUCTOR: QAConstruct = None
+
+
+def shard_document(document: Document, shard_size: int = 1000) -> List[List[Article]]:
+    """
+    Split `document` into consecutive shards of at most `shard_size` articles, in document order.
+    """
+    articles = list(document)
+    return list(
+        articles[idx : idx + shard_size] for idx in range(0, len(articles), shard_size)
+    )
+
+
+def _init_worker(
+    stopwords: List[str],
+    parser_config: Dict[str, Any],
+    pos_config: Dict[str, Any],
+    cache_path: str,
+    cache_size: int,
+    kwargs: Dict[str, Any],
+) -> None:
+    from stanza.pipeline.core import Pipeline
+
+    global _CONSTRUCTOR
+    _CONSTRUCTOR = QAConstruct(
+        stopwords=stopwords,
+        parser=Pipeline(**parser_config) if parser_config is not None else None,
+        pos=Pipeline(**pos_config) if pos_config is not None else None,
+        progress=False,
+        cache=(
+            ParseCache(path=cache_path, max_size=cache_size)
+            if cache_path is not None
+            else None
+        ),
+        **kwargs,
+    )
+
+
+def _construct_shard(
+    shard: List[Article],
+) -> Tuple[List[List[QAPair]], Dict[str, Any]]:
+    document = Document()
+    document.extend(shard)
+
+    shard_pairs = list(pairs for _, pairs in _CONSTRUCTOR.iter_articles(document=document))
+    shard_stats = _CONSTRUCTOR.stats.to_dict()
+    _CONSTRUCTOR.stats.reset()
+
+    return shard_pairs, shard_stats
+
+
+def iter_parallel_articles(
+    document: Document,
+    stopwords: List[str],
+    parser_config: Dict[str, Any],
+    pos_config: Dict[str, Any],
+    num_workers: int = 1,
+    shard_size: int = 1000,
+    id_prefix: str = "qa",
+    start: int = 0,
+    cache_path: str = None,
+    cache_size: int = 2**30,
+    stats: ConstructStats = None,
+    **kwargs,
+) -> Iterator[Tuple[Article, List[QAPair]]]:
+    """
+    Generate the QA pairs of `document` with a pool of worker processes, article by article and in
+    document order, like `QAConstruct.iter_articles`. See `parallel_construct` for the arguments;
+    `start` is the number of the first generated pair. The stats of the workers are added to
+    `stats`, if given, as their shards come back.
+
+    Yields:
+        `Tuple[Article, List[QAPair]]`
+    """
+    shards = shard_document(document=document, shard_size=shard_size)
+    if stats is not None:
+        kwargs = dict(kwargs, stats=stats.enabled)
+    initargs = (stopwords, parser_config, pos_config, cache_path, cache_size, kwargs)
+    index = start
+    pool = None
+
+    try:
+        if num_workers <= 1:
+            _init_worker(*initargs)
+            results = map(_construct_shard, shards)
+        else:
+            pool = multiprocessing.get_context("spawn").Pool(
+                processes=num_workers, initializer=_init_worker, initargs=initargs
+            )
+            results = pool.imap(_construct_shard, shards)
+
+        for shard, (shard_pairs, shard_stats) in tqdm(
+            zip(shards, results), total=len(shards), desc="QA Dataset Generation"
+        ):
+            if stats is not None:
+                stats.merge(other=shard_stats)
+            for article, pairs in zip(shard, shard_pairs):
+                for pair in pairs:
+                    pair.id = f"{id_prefix}_{index}"
+                    index += 1
+                yield article, pairs
+
+        if pool is not None:
+            pool.close()
+            pool.join()
+    except Exception as e:
+        raise e
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+
+def iter_parallel_pairs(*args, **kwargs) -> Iterator[QAPair]:
+    """
+    Generate the QA pairs of `document` with a pool of worker processes, one at a time and in
+    document order. Takes the same arguments as `iter_parallel_articles`.
+
+    Yields:
+        `QAPair`
+    """
+    for _, pairs in iter_parallel_articles(*args, **kwargs):
+        yield from pairs
+
+
+def parallel_construct(
+    document: Document,
+    stopwords: List[str],
+    parser_config: Dict[str, Any],
+    pos_config: Dict[str, Any],
+    num_workers: int = 1,
+    shard_size: int = 1000,
+    id_prefix: str = "qa",
+    cache_path: str = None,
+    cache_size: int = 2**30,
+    **kwargs,
+) -> QADataset:
+    """
+    Construct a QA dataset from `document` with a pool of worker processes.
+
+    The document is split into shards of `shard_size` articles. Every worker loads its own stanza
+    pipelines from `parser_config` and `pos_config` (the keyword arguments of `Pipeline`) and runs
+    `QAConstruct` on one shard at a time. Shards are merged back in document order and the pairs
+    are numbered only then, so the result is the same whatever the number of workers.
+
+    Args:
+        document (`Document`):
+            The articles to generate QA pairs from.
+        stopwords (`List[str]`):
+            The stopwords ignored when ranking contexts.
+        parser_config (`Dict[str, Any]`):
+            The keyword arguments of the constituency parser `Pipeline`, or `None` when a
+            `backend` (e.g. a `ReplayBackend`) is given instead.
+        pos_config (`Dict[str, Any]`):
+            The keyword arguments of the lemmatizer `Pipeline`, or `None` likewise, or when the
+            parser also has the `lemma` processor and serves both.
+        num_workers (`int`, default to `1`):
+            The number of worker processes. With `1`, everything runs in the current process.
+        shard_size (`int`, default to `1000`):
+            The number of articles handed to a worker at once.
+        id_prefix (`str`, default to `"qa"`):
+            The prefix of the generated pair IDs.
+        cache_path (`str`, default to `None`) and cache_size (`int`, default to `2**30`):
+            The on-disk parse cache shared by the workers, see `ParseCache`.
+        **kwargs:
+            The other keyword arguments of `QAConstruct` (`batch_size`, `rank_method`...).
+
+    Returns:
+        `QADataset`
+    """
+    data = QADataset()
+    data.extend(
+        iter_parallel_pairs(
+            document=document,
+            stopwords=stopwords,
+            parser_config=parser_config,
+            pos_config=pos_config,
+            num_workers=num_workers,
+            shard_size=shard_size,
+            id_prefix=id_prefix,
+            cache_path=cache_path,
+            cache_size=cache_size,
+            **kwargs,
+        )
+    )
+
+    return data
@@ -0,0 +1,356 @@
+"""IMPORTS"""
+import dataclasses
+import re
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Union
+
+from .cache import ParseCache
+
+if TYPE_CHECKING:
+    from stanza.models.common.doc import Sentence
+    from stanza.models.constituency.parse_tree import Tree
+    from stanza.pipeline.core import Pipeline
+
+BATCH_UNITS: List[str] = list(["sentence", "token"])
+PARSE_VERSION: int = 2
+BRACKET_PATTERN = re.compile(r"\(|\)|[^\s()]+")
+
+
+class ParseTree:
+    """
+    A node of a constituency tree, with the part of the interface of stanza's `Tree` that the
+    constructor uses (`label`, `children`, `is_leaf`, `leaf_labels`). Parses read back from a cache
+    or a replay file are built with it, so that they do not need stanza to be imported.
+    """
+
+    __slots__ = ("label", "children")
+
+    def __init__(self, label: str, children: List["ParseTree"] = None) -> None:
+        self.label = label
+        self.children: List[ParseTree] = list(children) if children is not None else []
+
+    def __eq__(self, other: object) -> bool:
+        # Equal to any tree of the same structure, stanza's included.
+        if not isinstance(other, ParseTree) and not callable(getattr(other, "is_leaf", None)):
+            return NotImplemented
+        return tree_to_list(self) == tree_to_list(other)
+
+    def __str__(self) -> str:
+        if self.is_leaf():
+            return self.label.replace(" ", "_")
+        return f"({self.label} {' '.join(str(child) for child in self.children)})"
+
+    def __repr__(self) -> str:
+        return str(self)
+
+    def is_leaf(self) -> bool:
+        """Whether this node is a word."""
+        return len(self.children) == 0
+
+    def leaf_labels(self) -> List[str]:
+        """The words of this subtree, in order."""
+        leaves: List[str] = []
+        stack: List[ParseTree] = [self]
+        while len(stack) > 0:
+            node = stack.pop()
+            if node.is_leaf():
+                leaves.append(node.label)
+            else:
+                stack.extend(reversed(node.children))
+        return leaves
+
+
+def tree_to_list(tree: Union[ParseTree, "Tree"]) -> Union[str, List[Any]]:
+    """
+    Convert a constituency tree into nested lists (`[label, *children]`, leaves as plain strings)
+    that survive a JSON round trip, whatever the tokens contain.
+    """
+    if tree.is_leaf():
+        return tree.label
+    return list([tree.label, *(tree_to_list(child) for child in tree.children)])
+
+
+def tree_from_list(value: Union[str, List[Any]]) -> ParseTree:
+    """
+    Rebuild a constituency tree from the output of `tree_to_list`.
+    """
+    if isinstance(value, str):
+        return ParseTree(label=value)
+    return ParseTree(
+        label=value[0], children=[tree_from_list(child) for child in value[1:]]
+    )
+
+
+def tree_from_brackets(text: str) -> ParseTree:
+    """
+    Read a constituency tree written in the bracketed format (`"(ROOT (S (N Luật_Đất_đai)))"`), the
+    underscores of a leaf standing for the spaces of a multi-syllable word.
+    """
+    stack: List[List[Any]] = [[]]
+    for token in BRACKET_PATTERN.findall(text):
+        match token:
+            case "(":
+                stack.append([])
+            case ")":
+                node = stack.pop()
+                stack[-1].append(node)
+            case _:
+                stack[-1].append(token if len(stack[-1]) == 0 else token.replace("_", " "))
+
+    def build(node: List[Any]) -> ParseTree:
+        if len(node) == 2 and isinstance(node[1], str):
+            return ParseTree(label=node[0], children=[ParseTree(label=node[1])])
+        return ParseTree(label=node[0], children=[build(child) for child in node[1:]])
+
+    try:
+        return build(stack[0][0])
+    except Exception as e:
+        raise ValueError(f"Malformed bracketed tree: {text}") from e
+
+
+@dataclasses.dataclass
+class ParsedEntity:
+    """
+    A named entity of a parsed summary, with character offsets relative to the summary and word
+    offsets (`[start_token, end_token)`) relative to its sentence.
+    """
+
+    text: str
+    type: str
+    start_char: int
+    end_char: int
+    start_token: int
+    end_token: int
+
+
+@dataclasses.dataclass
+class ParsedSentence:
+    """
+    A parsed sentence of a summary, keeping only what the constructor needs from stanza. The
+    lemmas of its words are only known when the parser also runs the `lemma` processor.
+    """
+
+    text: str
+    constituency: Union[ParseTree, "Tree"]
+    start_char: int
+    end_char: int
+    ents: List[ParsedEntity]
+    lemmas: List[str] = None
+
+
+@dataclasses.dataclass
+class ParsedSummary:
+    """
+    The parse of a single summary, detached from the (possibly batched) stanza document it came
+    from.
+    """
+
+    sentences: List[ParsedSentence]
+
+    @property
+    def ents(self) -> List[ParsedEntity]:
+        """Access to the named entities of every sentence of the summary, in order."""
+        return list(ent for sent in self.sentences for ent in sent.ents)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Converts the parse to a JSON-serializable dictionary.
+        """
+        return dict(
+            {
+                "sentences": [
+                    {
+                        "text": sent.text,
+                        "constituency": tree_to_list(sent.constituency),
+                        "start_char": sent.start_char,
+                        "end_char": sent.end_char,
+                        "ents": [dataclasses.asdict(ent) for ent in sent.ents],
+                        "lemmas": sent.lemmas,
+                    }
+                    for sent in self.sentences
+                ]
+            }
+        )
+
+    @classmethod
+    def from_dict(cls, value: Dict[str, Any]) -> "ParsedSummary":
+        """
+        Rebuild a `ParsedSummary` from the output of `to_dict`, whose trees may also be bracketed
+        strings (see `tree_from_brackets`).
+        """
+        return cls(
+            sentences=[
+                ParsedSentence(
+                    text=sent["text"],
+                    constituency=(
+                        tree_from_brackets(sent["constituency"])
+                        if isinstance(sent["constituency"], str)
+                        else tree_from_list(sent["constituency"])
+                    ),
+                    start_char=sent["start_char"],
+                    end_char=sent["end_char"],
+                    ents=[ParsedEntity(**ent) for ent in sent["ents"]],
+                    lemmas=sent.get("lemmas"),
+                )
+                for sent in value["sentences"]
+            ]
+        )
+
+    @classmethod
+    def from_stanza(cls, sentences: List["Sentence"]) -> "ParsedSummary":
+        """
+        Build a `ParsedSummary` from consecutive stanza sentences, rebasing every character offset
+        on the first token of the summary so that the result does not depend on the batch.
+        """
+        if len(sentences) == 0:
+            return cls(sentences=[])
+
+        offset = sentences[0].tokens[0].start_char
+        return cls(
+            sentences=[
+                ParsedSentence(
+                    text=sent.text,
+                    constituency=sent.constituency,
+                    start_char=sent.tokens[0].start_char - offset,
+                    end_char=sent.tokens[-1].end_char - offset,
+                    ents=[
+                        ParsedEntity(
+                            text=ent.text,
+                            type=ent.type,
+                            start_char=ent.start_char - offset,
+                            end_char=ent.end_char - offset,
+                            start_token=ent.tokens[0].id[0] - 1,
+                            end_token=ent.tokens[-1].id[-1],
+                        )
+                        for ent in sent.ents
+                    ],
+                    lemmas=word_lemmas(sentence=sent),
+                )
+                for sent in sentences
+            ]
+        )
+
+
+def word_lemmas(sentence: "Sentence") -> Optional[List[str]]:
+    """
+    The lemmas of the words of a stanza sentence, or `None` if the pipeline has no `lemma`
+    processor.
+    """
+    lemmas = list(word.lemma for word in sentence.words)
+    if any(lemma is None for lemma in lemmas):
+        return None
+    return lemmas
+
+
+def batch_size_of(summary: List[List[str]], batch_unit: str = "sentence") -> int:
+    """
+    Measure a tokenized summary in the unit used to fill parser batches.
+
+    Args:
+        summary (`List[List[str]]`):
+            The summary, as a list of sentences of tokens.
+        batch_unit (`str`, default to `"sentence"`):
+            Either `"sentence"` or `"token"`.
+
+    Returns:
+        `int`
+    """
+    match batch_unit:
+        case "sentence":
+            return len(summary)
+        case "token":
+            return sum(len(sent) for sent in summary)
+        case _:
+            raise ValueError(f"batch_unit must be one of {BATCH_UNITS}, got {batch_unit}")
+
+
+def iter_batches(
+    summaries: List[List[List[str]]], batch_size: int = 1, batch_unit: str = "sentence"
+) -> Iterator[List[int]]:
+    """
+    Group tokenized summaries into batches of at most `batch_size` sentences (or tokens). A summary
+    is never split across batches, so one larger than `batch_size` is sent on its own.
+
+    Yields:
+        `List[int]`: the indices of the summaries of each batch.
+    """
+    batch: List[int] = []
+    size = 0
+    for idx, summary in enumerate(summaries):
+        length = batch_size_of(summary=summary, batch_unit=batch_unit)
+        if len(batch) > 0 and size + length > batch_size:
+            yield batch
+            batch, size = [], 0
+        batch.append(idx)
+        size += length
+    if len(batch) > 0:
+        yield batch
+
+
+def parse_summaries(
+    summaries: List[List[List[str]]],
+    parser: "Pipeline",
+    batch_size: int = 1,
+    batch_unit: str = "sentence",
+    cache: ParseCache = None,
+) -> List[ParsedSummary]:
+    """
+    Run the constituency `parser` over many tokenized summaries at once and split the result back
+    into one `ParsedSummary` per input summary.
+
+    Args:
+        summaries (`List[List[List[str]]]`):
+            The summaries, each as a list of sentences of tokens (see `stanza_tokenizer`).
+        parser (`Pipeline`):
+            A pretokenized stanza pipeline with the `constituency` (and `ner`) processors.
+        batch_size (`int`, default to `1`):
+            The number of sentences (or tokens) sent to the parser in a single call.
+        batch_unit (`str`, default to `"sentence"`):
+            Either `"sentence"` or `"token"`.
+        cache (`ParseCache`, default to `None`):
+            An on-disk cache of previous parses. Summaries found in it are not sent to the parser,
+            and new parses are added to it.
+
+    Returns:
+        `List[ParsedSummary]`, in the order of `summaries`.
+    """
+    parsed: List[ParsedSummary] = [ParsedSummary(sentences=[]) for _ in summaries]
+    keys: List[str] = [None] * len(summaries)
+    pending: List[int] = []
+
+    for idx, summary in enumerate(summaries):
+        if len(summary) == 0:
+            continue
+        if cache is not None:
+            keys[idx] = cache.key(text=summary, pipeline=parser, version=PARSE_VERSION)
+            value = cache.get(key=keys[idx])
+            if value is not None:
+                parsed[idx] = ParsedSummary.from_dict(value=value)
+                continue
+        pending.append(idx)
+
+    for batch in iter_batches(
+        summaries=[summaries[idx] for idx in pending],
+        batch_size=batch_size,
+        batch_unit=batch_unit,
+    ):
+        batch = [pending[idx] for idx in batch]
+
+        try:
+            sentences = parser(
+                [sent for idx in batch for sent in summaries[idx]]
+            ).sentences
+        except Exception as e:
+            raise e
+
+        cursor = 0
+        for idx in batch:
+            count = len(summaries[idx])
+            parsed[idx] = ParsedSummary.from_stanza(sentences[cursor : cursor + count])
+            cursor += count
+            if cache is not None:
+                cache.put(key=keys[idx], value=parsed[idx].to_dict())
+
+    if cache is not None:
+        cache.flush()
+
+    return parsed
@@ -0,0 +1,68 @@
+"""IMPORTS"""
+import queue
+import threading
+from typing import Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+_STOP_POLL: float = 0.1
+
+
+def iter_prefetch(iterable: Iterable[T], size: int = 1) -> Iterator[T]:
+    """
+    Consume `iterable` in a background thread, keeping at most `size` of its items ready in a
+    bounded queue. Chaining such generators turns the steps of a loop into stages running at the
+    same time, each stage blocking once `size` items are waiting for the next one.
+
+    Items are yielded in order. An exception raised by `iterable` is raised again by the generator,
+    and closing the generator stops the thread and closes `iterable`.
+
+    Args:
+        iterable (`Iterable[T]`):
+            The items to produce in the background.
+        size (`int`, default to `1`):
+            The maximum number of items produced ahead of the consumer.
+
+    Yields:
+        `T`
+    """
+    items: queue.Queue = queue.Queue(maxsize=max(1, size))
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=_STOP_POLL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not put((False, item)):
+                    return
+            put((True, None))
+        except BaseException as e:
+            put((True, e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            done, item = items.get()
+            if done:
+                if item is not None:
+                    raise item
+                return
+            yield item
+    finally:
+        stop.set()
+        thread.join()
@@ -1,12 +1,19 @@
 """IMPORTS"""
-from typing import Dict, List, Tuple
-from stanza.models.common.doc import Document, Sentence, Word
-from stanza.models.constituency.parse_tree import Tree
-from stanza.pipeline.core import Pipeline
-from underthesea import sent_tokenize, word_tokenize
+import dataclasses
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
 
 from vietlegalqa.data.doc import Article
 
+from .backend import ParserBackend, StanzaBackend
+from .cache import ParseCache, TokenCache
+from .parse import ParsedSummary, parse_summaries
+
+if TYPE_CHECKING:
+    from stanza.models.common.doc import Document, Sentence
+    from stanza.models.constituency.parse_tree import Tree
+    from stanza.pipeline.core import Pipeline
+
 
 POS_TAGS: List[str] = list(
     [
@@ -26,23 +33,60 @@ POS_REPLACE: Dict[str, str] = dict(
         "S": "CLAUSE",
     }
 )
+RANK_METHODS: List[str] = list(["index", "substring"])
+
+# underthesea keeps a single tagger per model, which is not safe to call from several threads.
+_TOKENIZER_LOCK = threading.Lock()
+
+
+@dataclasses.dataclass
+class Candidate:
+    """
+    A generated answer of a summary, with the cloze question built for it and, when known, the
+    words of the question and their lemmas.
+    """
+
+    answer: str
+    question: str
+    type: str
+    tokens: List[str] = None
+    lemmas: List[str] = None
 
 
-def tree_to_text(tree: Tree, sep: str = " "):
+def tree_to_text(tree: "Tree", sep: str = " "):
     return sep.join(tree.leaf_labels())
 
 
-def stanza_tokenizer(text: str) -> str:
-    return [word_tokenize(sent) for sent in sent_tokenize(text)]
+def stanza_tokenizer(text: str, cache: TokenCache = None) -> List[List[str]]:
+    from underthesea import sent_tokenize, word_tokenize
+
+    with _TOKENIZER_LOCK:
+        if cache is None:
+            return [word_tokenize(sent) for sent in sent_tokenize(text)]
+
+        sentences: List[List[str]] = []
+        for sent in sent_tokenize(text):
+            tokens = cache.get(sentence=sent)
+            if tokens is None:
+                tokens = word_tokenize(sent)
+                cache.put(sentence=sent, tokens=tokens)
+            sentences.append(tokens)
+        return sentences
 
 
 def get_summary_nlp(
     summary: str,
-    parser: Pipeline,
+    parser: "Pipeline",
     word_sep: str = " ",
     sent_sep: str = " ",
-) -> Tuple[str, Document]:
-    summary_nlp: Document = parser(stanza_tokenizer(text=summary))
+    cache: ParseCache = None,
+    token_cache: TokenCache = None,
+) -> Tuple[str, ParsedSummary]:
+    summary_nlp: ParsedSummary = parse_summaries(
+        summaries=[stanza_tokenizer(text=summary, cache=token_cache)],
+        parser=parser,
+        cache=cache,
+    )[0]
     summary = sent_sep.join(
         [
             tree_to_text(tree=sent.constituency, sep=word_sep)
@@ -53,7 +97,7 @@ def get_summary_nlp(
     return summary, summary_nlp
 
 
-def get_pos(node: Tree, pos_tag: str, sep: str = " ") -> List[str]:
+def get_pos(node: "Tree", pos_tag: str, sep: str = " ") -> List[str]:
     if node.is_leaf():
         return []
 
@@ -68,7 +112,7 @@ def get_pos(node: Tree, pos_tag: str, sep: str = " ") -> List[str]:
     return keys
 
 
-def get_keys(doc_nlp: Document, pos_tag: str) -> List[str]:
+def get_keys(doc_nlp: "Document", pos_tag: str) -> List[str]:
     keys: List[str] = []
 
     try:
@@ -82,7 +126,7 @@ def get_keys(doc_nlp: Document, pos_tag: str) -> List[str]:
 
 
 def extract_clauses_constituent(
-    node: Tree, threshold: int == 3, sep: str = " "
+    node: "Tree", threshold: int == 3, sep: str = " "
 ) -> List[str]:
     if node.is_leaf():
         return []
@@ -118,7 +162,7 @@ def extract_clauses_comma(sent: str, threshold: int = 5) -> List[str]:
 
 
 def extract_clauses(
-    nlp: Document,
+    nlp: "Document",
     s_threshold: int = 3,
     comma_threshold: int = 5,
     sep: str = " ",
@@ -151,28 +195,304 @@ def extract_clauses(
     return sorted(clauses, key=len, reverse=True)
 
 
+@dataclasses.dataclass
+class Span:
+    """
+    A constituent of a sentence, as the interval `[start, end)` of its leaf offsets.
+    """
+
+    label: str
+    start: int
+    end: int
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def contains(self, other: "Span") -> bool:
+        """Whether `other` lies inside this span."""
+        return self.start <= other.start and other.end <= self.end
+
+
+@dataclasses.dataclass
+class SentenceSpans:
+    """
+    The phrase spans and clause candidates of one sentence, collected in a single traversal of
+    its constituency tree. Texts are only built on demand from the leaves.
+    """
+
+    leaves: List[str]
+    spans: Dict[str, List[Span]]
+    clauses: List[Span]
+    _offsets: List[int] = dataclasses.field(init=False, repr=False)
+    _ranked: List[Span] = dataclasses.field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._offsets = [0]
+        for leaf in self.leaves:
+            self._offsets.append(self._offsets[-1] + len(leaf))
+        self._ranked = sorted(self.clauses, key=self.char_length, reverse=True)
+
+    def char_length(self, span: Span) -> int:
+        """The length of the text of `span`, without building it."""
+        return (
+            self._offsets[span.end] - self._offsets[span.start] + max(len(span) - 1, 0)
+        )
+
+    def text(self, span: Span = None, sep: str = " ") -> str:
+        """The text of `span`, or of the whole sentence if no span is given."""
+        if span is None:
+            return sep.join(self.leaves)
+        return sep.join(self.leaves[span.start : span.end])
+
+    def containing(self, span: Span) -> Optional[Span]:
+        """The longest clause containing `span`, or `None` if there is none."""
+        for clause in self._ranked:
+            if clause.contains(span):
+                return clause
+        return None
+
+    def cloze_tokens(
+        self, clause: Span, span: Span, placeholder: str, words: List[str] = None
+    ) -> List[str]:
+        """
+        The leaves of `clause` with those of `span` replaced by `placeholder`. Another list aligned
+        with the leaves, such as their lemmas, can be given as `words` to be used instead.
+        """
+        words = self.leaves if words is None else words
+        return words[clause.start : span.start] + [placeholder] + words[span.end : clause.end]
+
+    def cloze(self, clause: Span, span: Span, placeholder: str, sep: str = " ") -> str:
+        """The text of `clause` with `span` replaced by `placeholder`."""
+        return sep.join(
+            self.cloze_tokens(clause=clause, span=span, placeholder=placeholder)
+        )
+
+
+def extract_comma_spans(leaves: List[str], threshold: int = 5) -> List[Span]:
+    """
+    Split a sentence on its comma leaves, as `extract_clauses_comma` does on text, merging each
+    part with the following ones until it has at least `threshold` words.
+    """
+    bounds: List[Tuple[int, int]] = []
+    start = 0
+    for idx, leaf in enumerate(leaves + [","]):
+        if leaf == ",":
+            bounds.append((start, idx))
+            start = idx + 1
+    if len(bounds) < 2:
+        return []
+
+    words = [len(leaf.split()) for leaf in leaves]
+    clauses: List[Span] = []
+    for idx, (start, end) in enumerate(bounds):
+        if start == end:
+            continue
+        count = sum(words[start:end])
+        for next_start, next_end in bounds[idx + 1 :]:
+            if count >= threshold:
+                break
+            count += sum(words[next_start:next_end])
+            end = next_end
+        clauses.append(Span(label=",", start=start, end=end))
+
+    return clauses
+
+
+def extract_spans(
+    tree: "Tree",
+    pos_tags: List[str] = None,
+    s_threshold: int = 3,
+    comma_threshold: int = None,
+) -> SentenceSpans:
+    """
+    Walk a constituency tree once and collect, in pre-order, the spans of every node whose
+    upper-cased label is in `pos_tags` (as `get_keys` does) and of every `S` node with more than
+    `s_threshold` leaves (as `extract_clauses_constituent` does).
+
+    Args:
+        tree (`Tree`):
+            The constituency tree of a sentence.
+        pos_tags (`List[str]`, default to `POS_TAGS`):
+            The phrase labels to collect.
+        s_threshold (`int`, default to `3`):
+            The minimum number of leaves (exclusive) of an S-clause.
+        comma_threshold (`int`, default to `None`):
+            If given, the comma-separated parts of the sentence are added to the clauses, see
+            `extract_comma_spans`.
+
+    Returns:
+        `SentenceSpans`
+    """
+    pos_tags = POS_TAGS if pos_tags is None else pos_tags
+    leaves: List[str] = []
+    spans: Dict[str, List[Span]] = {pos_tag: [] for pos_tag in pos_tags}
+    clauses: List[Span] = []
+
+    stack: List[Tuple["Tree", List[Span]]] = [(tree, None)]
+    while len(stack) > 0:
+        node, opened = stack.pop()
+        if opened is not None:
+            for span in opened:
+                span.end = len(leaves)
+            continue
+        if node.is_leaf():
+            leaves.append(node.label)
+            continue
+
+        opened = []
+        label = node.label.upper()
+        if label in spans:
+            opened.append(Span(label=label, start=len(leaves), end=len(leaves)))
+            spans[label].append(opened[-1])
+        if node.label == "S":
+            opened.append(Span(label=node.label, start=len(leaves), end=len(leaves)))
+            clauses.append(opened[-1])
+
+        stack.append((node, opened))
+        stack.extend((child, None) for child in reversed(node.children))
+
+    clauses = list(clause for clause in clauses if len(clause) > s_threshold)
+    if comma_threshold is not None:
+        clauses.extend(extract_comma_spans(leaves=leaves, threshold=comma_threshold))
+
+    return SentenceSpans(leaves=leaves, spans=spans, clauses=clauses)
+
+
 def is_stop(word: str, stopwords: List[str]) -> bool:
-    return word in stopwords 
+    return word in stopwords
+
+
+def get_question_lemmas(
+    questions: List[str],
+    pos: Union["Pipeline", ParserBackend],
+    stopwords: List[str],
+    cache: ParseCache = None,
+    tokens: List[List[str]] = None,
+    token_cache: TokenCache = None,
+    lemmas: List[Optional[List[str]]] = None,
+) -> List[List[str]]:
+    """
+    Lemmatize many questions with a single call of the `pos` pipeline (or backend).
+
+    The words of each question are taken from `tokens` when given (e.g. `Candidate.tokens`, built
+    from the already tokenized clause), otherwise the question is segmented again and only its
+    first sentence is kept, as in `get_answer_start`. With a pipeline, questions found in `cache`
+    are not sent to it, and new lemmas are added to it. Questions whose lemmas are already known,
+    given in `lemmas` (e.g. `Candidate.lemmas`, taken from the parse of the summary), are not
+    lemmatized again.
+
+    Returns:
+        `List[List[str]]`: the lemmas of each question that are not stopwords, in order.
+    """
+    stopwords = set(stopwords)
+    sentences = (
+        list(list(question_tokens) for question_tokens in tokens)
+        if tokens is not None
+        else [
+            next(iter(stanza_tokenizer(text=question, cache=token_cache)), [])
+            for question in questions
+        ]
+    )
+    known = lemmas if lemmas is not None else [None] * len(sentences)
+    pending = [idx for idx, sent_lemmas in enumerate(known) if sent_lemmas is None]
 
+    results: List[List[str]] = list(known)
+    if len(pending) > 0:
+        backend: ParserBackend = (
+            pos if isinstance(pos, ParserBackend) else StanzaBackend(pos=pos, cache=cache)
+        )
+        for idx, sent_lemmas in zip(
+            pending, backend.lemmatize([sentences[idx] for idx in pending])
+        ):
+            results[idx] = sent_lemmas
+
+    return list(
+        [lemma for lemma in sent_lemmas if not is_stop(word=lemma, stopwords=stopwords)]
+        for sent_lemmas in results
+    )
 
-def get_answer_start(
-    answer: str, question: str, article: Article, pos: Pipeline, stopwords: List[str]
+
+def select_context(q_tokens: List[str], article: Article, method: str = "substring") -> int:
+    """
+    Pick the context of `article` sharing the most tokens with the question.
+
+    Args:
+        q_tokens (`List[str]`):
+            The lemmas of the question.
+        article (`Article`):
+            The article whose contexts are ranked.
+        method (`str`, default to `"substring"`):
+            `"substring"` is the original rule, counting the question tokens that are substrings
+            of the context. `"index"` scores each context by the number of question tokens whose
+            syllables all occur in it, using `article.context_index`; it may select other contexts.
+
+    Returns:
+        `int`: the index of the best context (the first one on ties).
+    """
+    return select_contexts(queries=[q_tokens], article=article, method=method)[0]
+
+
+def select_contexts(
+    queries: List[List[str]], article: Article, method: str = "substring"
+) -> List[int]:
+    """
+    Pick the best context of `article` for each of a batch of questions (see `select_context`).
+    With `"index"`, the whole batch is scored with a single pass of array operations.
+
+    Returns:
+        `List[int]`: the index of the best context of each question.
+    """
+    match method:
+        case "index":
+            if len(queries) == 0:
+                return []
+            return article.context_index.top_batch(queries=queries).tolist()
+        case "substring":
+            best: List[int] = []
+            for q_tokens in queries:
+                scores = [
+                    len([None for word in q_tokens if word in ctx]) for ctx in article.context
+                ]
+                best.append(scores.index(max(scores)))
+            return best
+        case _:
+            raise ValueError(f"method must be one of {RANK_METHODS}, got {method}")
+
+
+def rank_contexts(
+    q_tokens: List[str], answer: str, article: Article, method: str = "substring"
 ) -> Tuple[int, int]:
-    question: List[Word] = pos(stanza_tokenizer(question)).sentences[0].words
+    """
+    Pick the context of `article` sharing the most tokens with the question (see
+    `select_context`) and locate the answer in it.
 
-    q_tokens: List[str] = [
-        word.lemma for word in question if not is_stop(word=word, stopwords=stopwords)
-    ]
+    Returns:
+        `Tuple[int, int]`: the index of the best context and the start of `answer` in it (`-1` if
+        the answer does not occur in that context).
+    """
+    context_id = select_context(q_tokens=q_tokens, article=article, method=method)
 
-    context_rank: List[Dict[str, int]] = [
-        {
-            "id": idx,
-            "score": len([None for word in q_tokens if word in ctx]),
-            "start": ctx.find(answer),
-        }
-        for idx, ctx in enumerate(article.context)
-    ]
+    return (context_id, article.context[context_id].find(answer))
 
-    context_rank = sorted(context_rank, key=lambda ctx: ctx["score"], reverse=True)
 
-    return (context_rank[0]["id"], context_rank[0]["start"])
+def get_answer_start(
+    answer: str,
+    question: str,
+    article: Article,
+    pos: Union["Pipeline", ParserBackend],
+    stopwords: List[str],
+    cache: ParseCache = None,
+    method: str = "substring",
+    token_cache: TokenCache = None,
+) -> Tuple[int, int]:
+    q_tokens: List[str] = get_question_lemmas(
+        questions=[question],
+        pos=pos,
+        stopwords=stopwords,
+        cache=cache,
+        token_cache=token_cache,
+    )[0]
+
+    return rank_contexts(
+        q_tokens=q_tokens, answer=answer, article=article, method=method
+    )
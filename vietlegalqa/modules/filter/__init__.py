@@ -0,0 +1,11 @@
+"""IMPORTS"""
+from .columns import QAColumns
+from .filter import Filter
+from .rules import (
+    AnswerAtStartRule,
+    LengthRule,
+    PlaceholderRule,
+    Rule,
+    StopwordRatioRule,
+    TypeQuotaRule,
+)
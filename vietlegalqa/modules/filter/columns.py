@@ -0,0 +1,158 @@
+"""IMPORTS"""
+from itertools import count
+from typing import Dict, List
+import numpy as np
+
+from vietlegalqa.data.doc import Document
+from vietlegalqa.data.qa import QADataset
+from vietlegalqa.data.utils import QA_FIELD as FIELD
+
+LENGTH_UNITS: List[str] = list(["char", "word"])
+# Whether each code point up to the last whitespace one is one of those `str.split` separates
+# words on.
+WHITESPACE = np.fromiter(
+    (chr(code).isspace() for code in range(0x3001)), dtype=bool, count=0x3001
+)
+CHUNK_SIZE = 4096
+
+
+def count_words(values: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+    The number of whitespace-separated words of each string of `values`, whose lengths in
+    characters are `lengths`, counted on their code points `CHUNK_SIZE` strings at a time, so that
+    the padded copy of a chunk stays small.
+    """
+    counts = np.zeros(len(values), dtype=np.int64)
+    for begin in range(0, len(values), CHUNK_SIZE):
+        chunk = lengths[begin : begin + CHUNK_SIZE]
+        width = max(1, int(chunk.max()))
+        codes = (
+            values[begin : begin + CHUNK_SIZE]
+            .astype(f"U{width}")
+            .view(np.uint32)
+            .reshape(len(chunk), width)
+        )
+        inside = ~WHITESPACE[np.minimum(codes, len(WHITESPACE) - 1)]
+        inside[codes >= len(WHITESPACE)] = True
+        inside &= np.arange(width) < chunk[:, None]
+        counts[begin : begin + CHUNK_SIZE] = inside[:, 0] + np.count_nonzero(
+            inside[:, 1:] > inside[:, :-1], axis=1
+        )
+    return counts
+
+
+class QAColumns:
+    """
+    The fields of a `QADataset` as aligned numpy arrays, one row per pair in dataset order, for
+    rules to be evaluated on every pair at once. Strings are stored as fixed-width unicode arrays,
+    for the `np.char` functions to run on whole columns, with `""` for a missing string, and a
+    missing `start` as `-1`. Lengths are computed once, on first use.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        article: np.ndarray,
+        question: np.ndarray,
+        answer: np.ndarray,
+        start: np.ndarray,
+        type: np.ndarray,
+        is_impossible: np.ndarray,
+    ) -> None:
+        self.id = ids
+        self.article = article
+        self.question = question
+        self.answer = answer
+        self.start = start
+        self.type = type
+        self.is_impossible = is_impossible
+        self._lengths: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_dataset(cls, qa: QADataset) -> "QAColumns":
+        """
+        Builds the columns of every pair of `qa`.
+        """
+        pairs = list(qa)
+
+        def strings(values) -> np.ndarray:
+            return np.array(
+                list(value if value is not None else "" for value in values), dtype=np.str_
+            )
+
+        return cls(
+            ids=strings(pair.id for pair in pairs),
+            article=strings(pair.article for pair in pairs),
+            question=strings(pair.question for pair in pairs),
+            answer=strings(pair.answer for pair in pairs),
+            start=np.fromiter(
+                (pair.start if pair.start is not None else -1 for pair in pairs),
+                dtype=np.int64,
+                count=len(pairs),
+            ),
+            type=strings(pair.type for pair in pairs),
+            is_impossible=np.fromiter(
+                (bool(pair.is_impossible) for pair in pairs), dtype=bool, count=len(pairs)
+            ),
+        )
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        if key not in FIELD:
+            raise KeyError(f"key must be one of {FIELD}, got {key}")
+        return getattr(self, key)
+
+    def length(self, field: str, unit: str = "char") -> np.ndarray:
+        """
+        The length of the strings of column `field`, in characters or whitespace-separated words.
+        """
+        if unit not in LENGTH_UNITS:
+            raise ValueError(f"unit must be one of {LENGTH_UNITS}, got {unit}")
+
+        key = f"{field}.{unit}"
+        if key not in self._lengths:
+            match unit:
+                case "char":
+                    self._lengths[key] = np.char.str_len(self[field]).astype(np.int64)
+                case "word":
+                    self._lengths[key] = count_words(
+                        values=self[field], lengths=self.length(field=field, unit="char")
+                    )
+        return self._lengths[key]
+
+    def contexts(self, document: Document) -> np.ndarray:
+        """
+        The text of the context each pair points to (its `article` being `"{article}__{ctx_id}"`),
+        or `None` when `document` has no such article or context. Each article is looked up once,
+        its contexts being gathered in one array the rows index into.
+        """
+        column = np.empty(len(self), dtype=object)
+        if len(self) == 0:
+            return column
+
+        article_ids, seps, ctx_ids = np.char.rpartition(self.article, "__").T
+        rows = np.flatnonzero((seps != "") & np.char.isdigit(ctx_ids))
+        article_ids = article_ids[rows].tolist()
+        # Numbering the articles in order of appearance is cheaper than sorting their IDs.
+        numbers = dict(zip(dict.fromkeys(article_ids), count()))
+        groups = np.fromiter(
+            map(numbers.__getitem__, article_ids), dtype=np.int64, count=len(rows)
+        )
+        ctx_ids = ctx_ids[rows].astype(np.int64)
+
+        texts: List[str] = []
+        counts = np.zeros(len(numbers), dtype=np.int64)
+        for index, article_id in enumerate(numbers):
+            context = document[article_id].context
+            if context is not None:
+                texts.extend(context)
+                counts[index] = len(context)
+        flat = np.empty(len(texts), dtype=object)
+        flat[:] = texts
+        offsets = np.cumsum(counts) - counts
+
+        found = ctx_ids < counts[groups]
+        column[rows[found]] = flat[offsets[groups[found]] + ctx_ids[found]]
+        return column
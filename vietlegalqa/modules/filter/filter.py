@@ -1,9 +1,74 @@
+"""IMPORTS"""
+from typing import List, Union
+import numpy as np
+
 from vietlegalqa.data.qa import QADataset
+from vietlegalqa.modules.stats import ConstructStats
+
+from .columns import QAColumns
+from .rules import Rule
+
 
+class Filter(Rule):
+    """
+    A batch filter over QA pairs: its rules are evaluated in turn on the columns of the whole
+    dataset, each one as a boolean mask, and a pair is kept if it satisfies all of them.
 
-class Filter:
-    def __init__(self) -> None:
-        pass
+    The time spent in each rule is recorded in `stats` as a stage, and the number of pairs each
+    rule rejects (among those kept by the previous ones) in the `rejected` counter, with a
+    `rejected.<rule>` counter per answer type. A `Filter` is a `Rule` itself, so filters compose.
+    """
+
+    name = "filter"
+
+    def __init__(self, rules: List[Rule] = None, stats: bool = True) -> None:
+        """
+        Args:
+            rules (`List[Rule]`, default to `None`):
+                The rules, in the order they are applied. Without rules every pair is kept.
+            stats (`bool`, default to `True`):
+                Whether the timing and rejection counts are recorded.
+        """
+        self.rules: List[Rule] = list(rules) if rules is not None else []
+        self.stats = ConstructStats(enabled=stats)
 
     def __call__(self, qa: QADataset) -> QADataset:
-        pass
+        keep = self.mask(columns=QAColumns.from_dataset(qa=qa))
+        result = QADataset()
+        result.extend(pair for pair, kept in zip(qa, keep) if kept)
+        return result
+
+    def mask(
+        self, columns: Union[QAColumns, QADataset], keep: np.ndarray = None
+    ) -> np.ndarray:
+        """
+        Returns the boolean mask of the pairs kept by every rule.
+
+        Args:
+            columns (`QAColumns` or `QADataset`):
+                The pairs to filter.
+            keep (`np.ndarray`, default to `None`):
+                The mask of the pairs to consider, all of them if `None`.
+
+        Returns:
+            `np.ndarray`
+        """
+        if isinstance(columns, QADataset):
+            columns = QAColumns.from_dataset(qa=columns)
+
+        keep = np.ones(len(columns), dtype=bool) if keep is None else keep.copy()
+        for rule in self.rules:
+            with self.stats.stage(name=rule.name, items=len(columns)):
+                keep_rule = rule.mask(columns=columns, keep=keep)
+
+            if self.stats.enabled:
+                rejected = keep & ~keep_rule
+                self.stats.count(counter="rejected", key=rule.name, value=int(rejected.sum()))
+                types, counts = np.unique(columns.type[rejected], return_counts=True)
+                for ans_type, count in zip(types, counts):
+                    self.stats.count(
+                        counter=f"rejected.{rule.name}", key=ans_type, value=int(count)
+                    )
+            keep &= keep_rule
+
+        return keep
@@ -0,0 +1,195 @@
+"""IMPORTS"""
+from typing import Dict, List
+import numpy as np
+
+from vietlegalqa.data.doc import Document
+
+from .columns import CHUNK_SIZE, QAColumns
+
+
+class Rule:
+    """
+    Abstract class, presenting a condition on QA pairs evaluated on the columns of a whole dataset
+    at once (see `Filter`).
+    """
+
+    name: str = "rule"
+
+    def mask(self, columns: QAColumns, keep: np.ndarray) -> np.ndarray:
+        """
+        Returns the boolean mask of the pairs satisfying the rule.
+
+        Args:
+            columns (`QAColumns`):
+                The columns of the pairs.
+            keep (`np.ndarray`):
+                The mask of the pairs kept by the previous rules. Rules that depend on the other
+                pairs (e.g. quotas) only take those into account; the others may ignore it.
+
+        Returns:
+            `np.ndarray`
+        """
+        raise NotImplementedError
+
+
+class LengthRule(Rule):
+    """
+    Bounds the length of the answers (or questions), in characters or words.
+    """
+
+    def __init__(
+        self,
+        field: str = "answer",
+        min_length: int = 1,
+        max_length: int = None,
+        unit: str = "char",
+    ) -> None:
+        """
+        Args:
+            field (`str`, default to `"answer"`):
+                The column measured, e.g. `"answer"` or `"question"`.
+            min_length (`int`, default to `1`) and max_length (`int`, default to `None`):
+                The inclusive bounds of the length, `None` meaning unbounded.
+            unit (`str`, default to `"char"`):
+                Either `"char"` or `"word"`.
+        """
+        self.field = field
+        self.min_length = min_length
+        self.max_length = max_length
+        self.unit = unit
+        self.name = f"{field}_length"
+
+    def mask(self, columns: QAColumns, keep: np.ndarray) -> np.ndarray:
+        lengths = columns.length(field=self.field, unit=self.unit)
+        mask = np.ones(len(lengths), dtype=bool)
+        if self.min_length is not None:
+            mask &= lengths >= self.min_length
+        if self.max_length is not None:
+            mask &= lengths <= self.max_length
+        return mask
+
+
+class AnswerAtStartRule(Rule):
+    """
+    Keeps the pairs whose answer is found at `start` in the context they point to. Only the pairs
+    kept by the previous rules are checked, `CHUNK_SIZE` contexts at a time.
+    """
+
+    name = "answer_at_start"
+
+    def __init__(self, document: Document) -> None:
+        """
+        Args:
+            document (`Document`):
+                The articles the pairs were generated from.
+        """
+        self.document = document
+
+    def mask(self, columns: QAColumns, keep: np.ndarray) -> np.ndarray:
+        contexts = columns.contexts(document=self.document)
+        found = keep & (contexts != None)  # noqa: E711, elementwise on an object array
+        found &= columns.start >= 0
+        rows = np.flatnonzero(found)
+        for begin in range(0, len(rows), CHUNK_SIZE):
+            chunk = rows[begin : begin + CHUNK_SIZE]
+            found[chunk] = np.char.startswith(
+                contexts[chunk].astype(np.str_), columns.answer[chunk], columns.start[chunk]
+            )
+        return found
+
+
+class PlaceholderRule(Rule):
+    """
+    Keeps the pairs whose question contains the placeholder of their answer type (e.g.
+    `NOUNPHRASE`), i.e. those whose answer was actually replaced.
+    """
+
+    name = "placeholder"
+
+    def mask(self, columns: QAColumns, keep: np.ndarray) -> np.ndarray:
+        return (np.char.find(columns.question, columns.type) >= 0) & (
+            columns.length(field="type") > 0
+        )
+
+
+class StopwordRatioRule(Rule):
+    """
+    Bounds the proportion of stopwords among the lower-cased syllables (whitespace-separated) of
+    the questions (or answers), so that questions made of function words only are rejected. Only
+    the pairs kept by the previous rules are measured.
+    """
+
+    def __init__(
+        self, stopwords: List[str], max_ratio: float = 0.5, field: str = "question"
+    ) -> None:
+        """
+        Args:
+            stopwords (`List[str]`):
+                The stopwords. Those of several syllables match none of the syllables.
+            max_ratio (`float`, default to `0.5`):
+                The largest proportion of stopwords kept.
+            field (`str`, default to `"question"`):
+                The column measured.
+        """
+        self.stopwords = set(stopwords)
+        self.max_ratio = max_ratio
+        self.field = field
+        self.name = f"{field}_stopwords"
+
+    def mask(self, columns: QAColumns, keep: np.ndarray) -> np.ndarray:
+        rows = np.flatnonzero(keep)
+        counts = columns.length(field=self.field, unit="word")[rows]
+        # Looking the syllables up has no numpy equivalent: it runs per row, the ratios on the
+        # whole column.
+        stopwords = np.fromiter(
+            (
+                sum(map(self.stopwords.__contains__, text.lower().split()))
+                for text in columns[self.field][rows].tolist()
+            ),
+            dtype=np.int64,
+            count=len(rows),
+        )
+        ratios = np.divide(
+            stopwords, counts, out=np.ones(len(rows), dtype=np.float64), where=counts > 0
+        )
+        mask = np.zeros(len(columns), dtype=bool)
+        mask[rows] = ratios <= self.max_ratio
+        return mask
+
+
+class TypeQuotaRule(Rule):
+    """
+    Keeps at most a given number of pairs of each answer type, the first ones in dataset order
+    among those kept by the previous rules. Answer types being upper-case (e.g. `NOUNPHRASE`), so
+    are the keys of the quotas.
+    """
+
+    name = "type_quota"
+
+    def __init__(self, quotas: Dict[str, int], default: int = None) -> None:
+        """
+        Args:
+            quotas (`Dict[str, int]`):
+                The largest number of pairs of each type.
+            default (`int`, default to `None`):
+                The quota of the other types, `None` meaning unbounded.
+        """
+        self.quotas = dict({ans_type.upper(): quota for ans_type, quota in quotas.items()})
+        self.default = default
+
+    def mask(self, columns: QAColumns, keep: np.ndarray) -> np.ndarray:
+        rows = np.flatnonzero(keep)
+        types, groups = np.unique(columns.type[rows], return_inverse=True)
+        quotas = np.full(len(types), len(rows), dtype=np.int64)
+        for index, ans_type in enumerate(types.tolist()):
+            quota = self.quotas.get(ans_type, self.default)
+            if quota is not None:
+                quotas[index] = quota
+        # The rank of each row among the kept rows of its type, in dataset order.
+        order = np.argsort(groups, kind="stable")
+        ranks = np.empty(len(rows), dtype=np.int64)
+        ranks[order] = np.arange(len(rows)) - np.searchsorted(groups[order], groups[order])
+
+        mask = np.ones(len(columns), dtype=bool)
+        mask[rows] = ranks < quotas[groups]
+        return mask
@@ -0,0 +1,2 @@
+"""IMPORTS"""
+from .preprocessor import Preprocessor
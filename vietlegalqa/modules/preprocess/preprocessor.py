@@ -1,3 +1,226 @@
+"""IMPORTS"""
+import multiprocessing
+import re
+from typing import Iterator, List
+from tqdm import tqdm
+
+from vietlegalqa.data.doc import Article, Document
+from vietlegalqa.data.utils import normalize_text
+
+# Zero-width characters and the byte order mark, which `str.split` does not treat as spaces.
+INVISIBLE = dict.fromkeys(map(ord, "\u200b\u200c\u200d\u2060\ufeff"))
+SENTENCE_END = re.compile(r"[.!?…]+[\"”’)\]]*\s+")
+CLAUSE_END = re.compile(r"[;,:]\s+")
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split a normalized text after sentence-final punctuation followed by an upper-case letter or a
+    digit, which is enough for legal texts and much cheaper than a trained segmenter.
+    """
+    sentences: List[str] = []
+    start = 0
+    for match in SENTENCE_END.finditer(text):
+        following = text[match.end() : match.end() + 1]
+        if following.isupper() or following.isdigit():
+            sentences.append(text[start : match.end()].rstrip())
+            start = match.end()
+    if start < len(text):
+        sentences.append(text[start:])
+    return sentences
+
+
+def split_long(text: str, max_length: int) -> List[str]:
+    """
+    Cut a text longer than `max_length` characters into pieces that are not, preferably after a
+    clause delimiter (`;`, `,` or `:`), otherwise between words. A single word longer than
+    `max_length` is kept whole.
+    """
+    pieces: List[str] = []
+    while len(text) > max_length:
+        cut = -1
+        for match in CLAUSE_END.finditer(text, 0, max_length + 1):
+            cut = match.end()
+        if cut <= 0:
+            cut = text.rfind(" ", 0, max_length + 1) + 1
+        if cut <= 0:
+            cut = text.find(" ", max_length) + 1
+        if cut <= 0:
+            break
+        pieces.append(text[:cut].rstrip())
+        text = text[cut:]
+    pieces.append(text)
+    return pieces
+
+
+def pack(units: List[str], max_length: int) -> List[str]:
+    """
+    Join consecutive `units` (e.g. the sentences of an overlong line) with spaces into as few pieces
+    of at most `max_length` characters as possible, without splitting a unit.
+    """
+    pieces: List[str] = []
+    for unit in units:
+        if len(pieces) > 0 and len(pieces[-1]) + 1 + len(unit) <= max_length:
+            pieces[-1] = f"{pieces[-1]} {unit}"
+        else:
+            pieces.append(unit)
+    return pieces
+
+
 class Preprocessor:
-    def __init__(self) -> None:
-        pass
+    """
+    Normalizes the raw articles of a `Document` before construction, so that the same text always
+    reaches the tokenizer, the parser and their caches in the same form:
+
+    - every text is put in NFC Unicode form, invisible characters are removed and whitespace is
+      collapsed to single spaces (see `normalize_text`);
+    - contexts longer than `max_context_length` characters are split at line breaks, each line
+      becoming a context of its own, and lines still longer than that are split at sentence
+      boundaries into pieces of at most `max_context_length` characters;
+    - summaries with a sentence longer than `max_sentence_length` characters are split around it,
+      and the sentence itself is cut at clause delimiters, each piece becoming a summary of its
+      own so that the parser never receives it whole.
+
+    Empty summaries and contexts are dropped. Articles are processed by a pool of worker processes
+    and streamed back in document order. Since long contexts are split and empty ones dropped, the
+    pairs constructed from the result (their `"{article}__{ctx_id}"` and `start`) refer to the
+    preprocessed document, not to the raw one: it must be saved alongside them to join them back.
+    """
+
+    def __init__(
+        self,
+        max_context_length: int = 4000,
+        max_sentence_length: int = 500,
+        num_workers: int = 1,
+        chunk_size: int = 100,
+        progress: bool = True,
+    ) -> None:
+        """
+        Args:
+            max_context_length (`int`, default to `4000`):
+                The length, in characters, above which contexts are split. `None` keeps every
+                context whole.
+            max_sentence_length (`int`, default to `500`):
+                The length, in characters, above which summary sentences are segmented. `None`
+                keeps every summary whole.
+            num_workers (`int`, default to `1`):
+                The number of worker processes. With `1`, everything runs in the current process.
+            chunk_size (`int`, default to `100`):
+                The number of articles handed to a worker at once.
+            progress (`bool`, default to `True`):
+                Whether a progress bar is shown.
+        """
+        self.max_context_length = max_context_length
+        self.max_sentence_length = max_sentence_length
+        self.num_workers = num_workers
+        self.chunk_size = chunk_size
+        self.progress = progress
+
+    def __call__(self, document: Document) -> Document:
+        result = Document()
+        result.extend(self.iter_articles(document=document))
+        return result
+
+    def iter_articles(self, document: Document) -> Iterator[Article]:
+        """
+        Generate the preprocessed articles of `document` one at a time, in document order.
+
+        Yields:
+            `Article`
+        """
+        pool = None
+        try:
+            if self.num_workers <= 1:
+                articles = map(self.process, document)
+            else:
+                pool = multiprocessing.get_context("spawn").Pool(processes=self.num_workers)
+                articles = pool.imap(self.process, document, chunksize=self.chunk_size)
+
+            yield from tqdm(
+                articles,
+                total=len(document),
+                desc="Preprocessing",
+                disable=not self.progress,
+            )
+
+            if pool is not None:
+                pool.close()
+                pool.join()
+        except Exception as e:
+            raise e
+        finally:
+            if pool is not None:
+                pool.terminate()
+
+    def normalize(self, text: str) -> str:
+        """
+        NFC form, without invisible characters and with single spaces between words.
+        """
+        return normalize_text(text.translate(INVISIBLE))
+
+    def split_context(self, context: str) -> List[str]:
+        """
+        Normalize a raw context and, if it is longer than `max_context_length` characters, split it
+        into its lines, and the lines still longer than that into pieces of whole sentences of at
+        most `max_context_length` characters (a single longer sentence being kept whole). Short
+        contexts and lines are never merged.
+        """
+        text = self.normalize(context)
+        if len(text) == 0:
+            return []
+        if self.max_context_length is None or len(text) <= self.max_context_length:
+            return [text]
+
+        pieces: List[str] = []
+        for paragraph in map(self.normalize, context.splitlines()):
+            if len(paragraph) <= self.max_context_length:
+                pieces.append(paragraph)
+            else:
+                pieces.extend(
+                    pack(units=split_sentences(paragraph), max_length=self.max_context_length)
+                )
+        return list(piece for piece in pieces if len(piece) > 0)
+
+    def split_summary(self, summary: str) -> List[str]:
+        """
+        Normalize a raw summary and, if one of its sentences is longer than `max_sentence_length`
+        characters, split it into several summaries around and within that sentence.
+        """
+        summary = self.normalize(summary)
+        if len(summary) == 0:
+            return []
+        if self.max_sentence_length is None or len(summary) <= self.max_sentence_length:
+            return [summary]
+
+        summaries: List[str] = []
+        current: List[str] = []
+        for sentence in split_sentences(summary):
+            if len(sentence) <= self.max_sentence_length:
+                current.append(sentence)
+                continue
+            if len(current) > 0:
+                summaries.append(" ".join(current))
+                current = []
+            summaries.extend(split_long(text=sentence, max_length=self.max_sentence_length))
+        if len(current) > 0:
+            summaries.append(" ".join(current))
+        return summaries
+
+    def process(self, article: Article) -> Article:
+        """
+        Preprocess a single article.
+        """
+        return Article(
+            index=article.id,
+            title=self.normalize(article.title) if article.title is not None else None,
+            summary=list(
+                piece
+                for summary in article.summary or []
+                for piece in self.split_summary(summary)
+            ),
+            context=list(
+                piece
+                for context in article.context or []
+                for piece in self.split_context(context)
+            ),
+        )
@@ -0,0 +1,127 @@
+"""IMPORTS"""
+import contextlib
+import dataclasses
+import json
+import time
+from collections import Counter
+from typing import Any, Dict, Iterator
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+@dataclasses.dataclass
+class StageStats:
+    """
+    The cumulative wall and CPU time spent in one stage, and the number of items it processed.
+    CPU time is measured on the thread running the stage.
+    """
+
+    wall: float = 0.0
+    cpu: float = 0.0
+    calls: int = 0
+    items: int = 0
+
+    @property
+    def throughput(self) -> float:
+        """Access to the number of items processed per second of wall time."""
+        return self.items / self.wall if self.wall > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(
+            {
+                "wall": self.wall,
+                "cpu": self.cpu,
+                "calls": self.calls,
+                "items": self.items,
+                "throughput": self.throughput,
+            }
+        )
+
+
+class ConstructStats:
+    """
+    Instrumentation of a construction (or filtering) run: the time spent in each stage and
+    counters of the candidates generated, kept and dropped, per answer type.
+
+    A disabled instance records nothing, its `stage` context being a shared no-op.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        """
+        Args:
+            enabled (`bool`, default to `True`):
+                Whether anything is recorded.
+        """
+        self.enabled = enabled
+        self.stages: Dict[str, StageStats] = {}
+        self.counters: Dict[str, Counter] = {}
+
+    def reset(self) -> None:
+        """
+        Forgets everything recorded so far.
+        """
+        self.stages = {}
+        self.counters = {}
+
+    @contextlib.contextmanager
+    def _timed(self, name: str, items: int) -> Iterator[None]:
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            stage = self.stages.setdefault(name, StageStats())
+            stage.wall += time.perf_counter() - wall
+            stage.cpu += time.thread_time() - cpu
+            stage.calls += 1
+            stage.items += items
+
+    def stage(self, name: str, items: int = 1):
+        """
+        A context timing the block it wraps as a call of stage `name` over `items` items.
+        """
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self._timed(name=name, items=items)
+
+    def count(self, counter: str, key: str, value: int = 1) -> None:
+        """
+        Adds `value` to `key` in `counter` (e.g. `count("dropped.not_found", "NOUNPHRASE")`).
+        """
+        if not self.enabled:
+            return
+        self.counters.setdefault(counter, Counter())[key] += value
+
+    def merge(self, other: Dict[str, Any]) -> None:
+        """
+        Adds the stats of another run, as returned by its `to_dict`.
+        """
+        if not self.enabled:
+            return
+        for name, values in other["stages"].items():
+            stage = self.stages.setdefault(name, StageStats())
+            stage.wall += values["wall"]
+            stage.cpu += values["cpu"]
+            stage.calls += values["calls"]
+            stage.items += values["items"]
+        for counter, values in other["counters"].items():
+            self.counters.setdefault(counter, Counter()).update(values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(
+            {
+                "stages": {name: stage.to_dict() for name, stage in self.stages.items()},
+                "counters": {
+                    counter: dict(values) for counter, values in self.counters.items()
+                },
+            }
+        )
+
+    def to_json(self, path: str) -> None:
+        """
+        Dumps the stats to a JSON file.
+        """
+        try:
+            with open(file=path, mode="w", encoding="utf-8") as file:
+                json.dump(obj=self.to_dict(), fp=file, ensure_ascii=False, indent=2)
+        except Exception as e:
+            raise e